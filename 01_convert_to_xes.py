@@ -11,23 +11,24 @@ Outputs: An XES file that represents the input data in a structured event log fo
          mining tools such as PM4Py.
 """
 import os
+from contextlib import ExitStack
+from functools import partial
+import numpy as np
 import pandas as pd
 import pm4py
 from pm4py.objects.log.obj import EventLog, Trace, Event
 from pm4py.objects.log.exporter.xes import exporter as xes_exporter
+from event_log_store import ParquetEventLogWriter, write_event_log_parquet
+from raw_event_log import create_event_log_dataframe, load_data, raw_dtypes
+from xes_stream import XesStreamWriter
+from build_cache import BuildCache, run_stale_files
+from dataset_index import directory_index, processed_input_dir, raw_input_dir
+from kpi_engine import default_end_activity
+from parallel_runner import default_num_workers
+from instrumentation import measure
 
-def create_event_log(df):
-    # Check if necessary columns exist
-    required_columns = ['uniqueID', 'productNr', 'event', 'timeStamp', 'productType',
-                        'vehicleType', 'vehicle', 'currentDecayLevel', 'processingStation',
-                        'productIDStr', 'productID']
-    for col in required_columns:
-        if col not in df.columns:
-            raise KeyError(f"The column '{col}' is not present in the DataFrame.")
-
-    # Handle missing or NaN values in 'productNr' (drop rows with NaN in 'productNr')
-    df = df.dropna(subset=['productNr'])
-
+# Function to build a pm4py EventLog from an event log DataFrame
+def event_log_from_dataframe(event_df):
     # Create the EventLog object
     log = EventLog()
 
@@ -44,59 +45,182 @@ def create_event_log(df):
     # Add log attributes
     log.attributes["concept:name"] = "XES Event Log"
 
-    # Group by productNr (case concept)
-    grouped = df.groupby('productNr')
-    for productNr, group in grouped:
+    if event_df.empty:
+        return log
+
+    # The rows are sorted by productNr, so every case is a contiguous slice
+    product_nrs = event_df['productNr'].to_numpy()
+    case_starts = np.flatnonzero(np.r_[True, product_nrs[1:] != product_nrs[:-1]])
+    case_ends = np.r_[case_starts[1:], len(product_nrs)]
+    case_names = event_df['case:concept:name'].to_numpy()
+
+    # Materialize the event attributes once and build the traces from the slices
+    records = event_df.drop(columns=['case:concept:name']).to_dict('records')
+    for start, end in zip(case_starts, case_ends):
         # Create a trace and set 'productNr' as the case identifier
-        trace = Trace(attributes={"concept:name": str(productNr)})
-        for _, row in group.iterrows():
-            # Create an event with the relevant attributes
-            event = Event({
-                "concept:name": row["event"],  # Name of the event (activity)
-                "lifecycle:transition": "complete",  # Add lifecycle transition
-                "time:timestamp": pd.to_datetime(row["timeStamp"]),  # Convert timestamp to datetime
-                "productType": row["productType"],  # Product type
-                "productNr": row["productNr"],  # Product number
-                "vehicleType": str(row["vehicleType"]),  # Vehicle type (if applicable)
-                "org:resource": str(row["vehicle"]),  # Vehicle involved (if applicable)
-                "uniqueID": int(row["uniqueID"]),  # Unique ID for the event
-                "currentDecayLevel": float(row["currentDecayLevel"]),  # Current decay level
-                "productIDStr": row["productIDStr"],  # Product ID string
-                "processingStation": str(row["processingStation"]) if pd.notna(row["processingStation"]) else "NA",  # Processing station
-                "productID": row["productID"]  # Include productID as per your XES snippet
-            })
-            trace.append(event)  # Append event to trace
+        trace = Trace([Event(record) for record in records[start:end]],
+                      attributes={"concept:name": case_names[start]})
         log.append(trace)  # Append trace to the event log
     return log
 
-# Function to load data from txt
-def load_data(file_path):
-    # Assuming the .txt file is tab-separated, adjust delimiter if necessary
-    df = pd.read_csv(file_path, delimiter='\t')
-    return df
+def create_event_log(df):
+    # Prepare all event attributes in a single columnar pass
+    return event_log_from_dataframe(create_event_log_dataframe(df))
+
+# Function to read a raw file in chunks and yield event log DataFrames of completed cases
+def iter_event_log_chunks(file_path, chunk_size=100_000, end_activity=default_end_activity):
+    # A case is complete once its end activity has been read; all other cases are carried over to the next chunk,
+    # so memory depends on the number of open cases instead of the file size
+    open_cases = None
+    written_cases = set()
+    for chunk in pd.read_csv(file_path, delimiter='\t', dtype=raw_dtypes, chunksize=chunk_size):
+        chunk = chunk.dropna(subset=['productNr'])
+        # Events of a case that was already written would become a second trace with the same name
+        repeated = chunk['productNr'].isin(written_cases)
+        if repeated.any():
+            product_nrs = ', '.join(map(str, chunk.loc[repeated, 'productNr'].unique()[:10]))
+            raise ValueError(f"Events after the end activity '{end_activity}' of completed cases in '{file_path}' "
+                             f"(productNr {product_nrs}); convert this file with streaming = False.")
+        if open_cases is not None:
+            chunk = pd.concat([open_cases, chunk], ignore_index=True)
+        completed_cases = chunk.loc[chunk['event'] == end_activity, 'productNr'].unique()
+        completed = chunk['productNr'].isin(completed_cases)
+        open_cases = chunk[~completed]
+        if completed.any():
+            written_cases.update(int(product_nr) for product_nr in completed_cases)
+            yield create_event_log_dataframe(chunk[completed])
+
+    # Cases without an end activity are written once the whole file has been read
+    if open_cases is not None and not open_cases.empty:
+        yield create_event_log_dataframe(open_cases)
+
+# Function to get the path of the XES output of a raw file, gzip-compressed when requested
+def xes_output_path(file_path, output_folder, compress_xes=False):
+    extension = ".xes.gz" if compress_xes else ".xes"
+    return os.path.join(output_folder, os.path.basename(file_path).replace(".txt", extension))
+
+# Function to convert a single raw file
+def convert_file(file_path, output_folder, output_format="xes", compress_xes=False):
+    file_name = os.path.basename(file_path)
+    output_paths = []
+    with measure("read_raw", file_name) as measurement:
+        df = load_data(file_path)
+        measurement.count_events(df, case_column='productNr')
+    with measure("create_event_log_dataframe", file_name) as measurement:
+        event_df = create_event_log_dataframe(df)
+        measurement.count_events(event_df)
+    if output_format in ("parquet", "both"):
+        output_path = os.path.join(output_folder, file_name.replace(".txt", ".parquet"))
+        print(f"Saving Parquet to: {output_path}")  # Debugging statement
+        with measure("write_parquet", file_name) as measurement:
+            write_event_log_parquet(event_df, output_path)
+            measurement.count_events(event_df)
+        output_paths.append(output_path)
+    if output_format in ("xes", "both") and compress_xes:
+        # The streaming writer compresses the XES file and does not need the EventLog object
+        output_path = xes_output_path(file_path, output_folder, compress_xes)
+        print(f"Saving XES to: {output_path}")  # Debugging statement
+        with measure("export_xes", file_name) as measurement, XesStreamWriter(output_path) as writer:
+            writer.write(event_df)
+            measurement.count_events(event_df)
+        output_paths.append(output_path)
+    elif output_format in ("xes", "both"):
+        with measure("event_log_from_dataframe", file_name) as measurement:
+            log = event_log_from_dataframe(event_df)
+            measurement.count_events(event_df)
+        output_path = xes_output_path(file_path, output_folder)
+        print(f"Saving XES to: {output_path}")  # Debugging statement
+        with measure("export_xes", file_name) as measurement:
+            xes_exporter.apply(log, output_path)
+            measurement.count_events(event_df)
+        output_paths.append(output_path)
+    return output_paths
+
+# Function to convert a single raw file in chunks, writing the completed cases as they are found
+def convert_file_streaming(file_path, output_folder, output_format="parquet", compress_xes=False, chunk_size=100_000,
+                           end_activity=default_end_activity):
+    file_name = os.path.basename(file_path)
+    output_paths = []
+    try:
+        with ExitStack() as stack:
+            writers = []
+            if output_format in ("parquet", "both"):
+                output_path = os.path.join(output_folder, file_name.replace(".txt", ".parquet"))
+                print(f"Streaming Parquet to: {output_path}")  # Debugging statement
+                writers.append(stack.enter_context(ParquetEventLogWriter(output_path)))
+                output_paths.append(output_path)
+            if output_format in ("xes", "both"):
+                output_path = xes_output_path(file_path, output_folder, compress_xes)
+                print(f"Streaming XES to: {output_path}")  # Debugging statement
+                writers.append(stack.enter_context(XesStreamWriter(output_path)))
+                output_paths.append(output_path)
+
+            measurement = stack.enter_context(measure("convert_streaming", file_name))
+            num_events = num_cases = 0
+            for event_df in iter_event_log_chunks(file_path, chunk_size, end_activity):
+                for writer in writers:
+                    writer.write(event_df)
+                num_events += len(event_df)
+                num_cases += event_df['case:concept:name'].nunique() if measurement.enabled else 0
+            measurement.counts.update(events=num_events, cases=num_cases)
+    except Exception:
+        # A failed conversion must not leave event logs behind that the next stages would read as complete runs
+        for output_path in output_paths:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+        raise
+    return output_paths
 
-# Function to process all files
-def process_all_files(input_folder, output_folder):
+# Function to process all files, or only the given raw files of the input folder
+def process_all_files(input_folder, output_folder, output_format="xes", streaming=False,
+                      num_workers=default_num_workers, use_build_cache=True, compress_xes=False, file_paths=None,
+                      end_activity=default_end_activity):
     print(f"Processing files in folder: {input_folder}")  # Debugging statement
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)  # Create output folder if it doesn't exist
-    for file_name in os.listdir(input_folder):
-        if file_name.endswith(".txt"):
-            file_path = os.path.join(input_folder, file_name)
-            print(f"Processing file: {file_name}")  # Debugging statement
-            df = load_data(file_path)
-            log = create_event_log(df)
-            output_path = os.path.join(output_folder, file_name.replace(".txt", ".xes"))
-            print(f"Saving XES to: {output_path}")  # Debugging statement
-            xes_exporter.apply(log, output_path)
+    if file_paths is None:
+        file_paths = directory_index(input_folder, ".txt").file_paths()
+    settings = {'output_format': output_format, 'streaming': streaming, 'compress_xes': compress_xes}
+    if streaming:
+        convert = partial(convert_file_streaming, end_activity=end_activity)
+        settings['end_activity'] = end_activity
+    else:
+        convert = convert_file
+    # Only convert the files that changed since the last run
+    cache = BuildCache(output_folder, "01_convert_to_xes", settings, enabled=use_build_cache)
+    # Convert the files in parallel; a failing file is reported without stopping the others
+    return run_stale_files(cache, partial(convert, output_folder=output_folder, output_format=output_format,
+                                          compress_xes=compress_xes),
+                           file_paths, num_workers, description="Converted")
 
 # Get current working directory
 current_directory = os.getcwd()
 
 # Specify input and output directories relative to the current directory
-input_folder = os.path.join(current_directory, "01_raw_input")  # replace "input2" with your actual folder name
-output_folder = os.path.join(current_directory, "02_processed_input")  # specify the folder for XES files
+input_folder = os.path.join(current_directory, raw_input_dir)  # replace "input2" with your actual folder name
+output_folder = os.path.join(current_directory, processed_input_dir)  # specify the folder for XES files
+
+# Output format of the event logs: "xes", "parquet" (columnar store read by stages 02 and 03) or "both"
+output_format = "xes"
+
+# Read the raw files in chunks and write the completed cases as they are found, so large runs can be converted with
+# bounded memory (to Parquet, XES or both)
+streaming = False
+
+# Activity that completes a case when streaming, the same as the end of a product's cycle in the KPIs of stage 02;
+# events of a case after its end activity make the streaming conversion of the file fail
+end_activity = default_end_activity
+
+# Write the XES files gzip-compressed (.xes.gz)
+compress_xes = False
+
+# Number of files converted in parallel (1 converts the files one by one in this process)
+num_workers = default_num_workers
+
+# Skip the files whose raw input and settings did not change since the last run
+use_build_cache = True
 
 # Start the procedure when running the script
 if __name__ == "__main__":
-    process_all_files(input_folder, output_folder)
+    process_all_files(input_folder, output_folder, output_format, streaming, num_workers, use_build_cache,
+                      compress_xes, end_activity=end_activity)
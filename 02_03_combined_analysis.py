@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 16 2026
+
+Script: 02_03_combined_analysis.py
+Purpose: This script combines stages 02 and 03 in a single pass over the event logs. Every log is loaded once and
+         used both for the event log KPIs (cycle time and vehicle utilization) and for process discovery with the
+         Inductive Miner and the token-based replay fitness and precision. It writes the same output files as
+         02_extract_event_log_indicators.py and 03_extract_process_mining_indicators.py, which can still be run
+         separately.
+Inputs: XES (or Parquet) event log files from a specified input directory.
+Outputs: KPI text files in the stage 02 output directory, and PNML files, PNG images and metrics text files in the
+         stage 03 output directory.
+"""
+
+import os
+from functools import partial
+
+from build_cache import BuildCache, run_stale_files
+from conformance import extract_process_mining_indicators, mining_columns
+from dataset_index import directory_index, kpi_output_dir, mining_output_dir, processed_input_dir
+from event_log_store import decode_event_log, event_log_name, read_event_log
+from kpi_engine import (default_end_activity, default_start_activity, default_utilization_mode,
+                        default_vehicle_activity_pattern, extract_event_log_indicators, kpi_columns)
+from parallel_runner import default_num_workers
+from render_petri_nets import render_all_models
+from results_store import conformance_stage, default_results_db, event_log_kpis_stage, has_log
+from instrumentation import measure
+
+# Define the input directory; the output directories (kpi_output_dir, mining_output_dir) are those of stages 02 and 03
+input_dir = processed_input_dir
+
+# Event log format to read: ".xes", ".xes.gz" or ".parquet" (columnar store written by 01_convert_to_xes.py)
+input_extension = ".xes"
+
+# Activities that start and end a product's cycle, and the (regular expression) activities that involve a vehicle
+start_activity = default_start_activity
+end_activity = default_end_activity
+vehicle_activity_pattern = default_vehicle_activity_pattern
+
+# Vehicle utilization: time between the first and the last vehicle event ("span") or merged busy intervals from
+# assignment to drop-off, with idle time and concurrency profile ("busy")
+utilization_mode = default_utilization_mode
+
+# Token-based replay per distinct variant with cached results ("variants") or over every trace with pm4py ("log");
+# both give the same fitness and precision. "approximate" estimates them from a sample of the cases, stratified by
+# variant, until the confidence intervals are within the tolerance (for screening; the intervals and sample size
+# are written to the metrics files)
+replay_mode = "variants"
+
+# Confidence level and interval half-width (fitness as a fraction) of the approximate replay mode
+approximation = {'confidence': 0.95, 'tolerance': 0.01}
+
+# Rendering of the Petri nets to PNG: "inline" (while computing the metrics), "deferred" (in a worker pool after all
+# metrics have been written, skipping models whose structure was already rendered) or "off" (run
+# render_petri_nets.py on demand)
+render_mode = "deferred"
+
+# Number of event logs processed in parallel (1 processes the logs one by one in this process)
+num_workers = default_num_workers
+
+# Skip the event logs whose content and settings did not change since the last run
+use_build_cache = True
+
+# SQLite results table that stages 04 to 06 read the metrics from
+results_db = default_results_db
+
+# Function to compute the KPIs and the process mining indicators of a single event log file
+def analyze_file(file_path, kpi_output_dir, mining_output_dir, replay_mode="variants", render_mode="deferred",
+                 results_db=None, approximation=None):
+    file_name = os.path.basename(file_path)
+    log_name = event_log_name(file_path)
+    print(f"Processing file: {file_name}")
+
+    # Load the event log once as a compact log, with the columns both stages need
+    columns = list(dict.fromkeys(kpi_columns + mining_columns))
+    with measure("read_event_log", file_name) as measurement:
+        event_df = read_event_log(file_path, columns=columns)
+        measurement.count_events(event_df)
+
+    with measure("kpis", file_name) as measurement:
+        measurement.count_events(event_df)
+        output_files = extract_event_log_indicators(event_df, log_name, kpi_output_dir, start_activity,
+                                                    end_activity, vehicle_activity_pattern, results_db,
+                                                    utilization_mode)
+    # pm4py expects plain string columns
+    output_files += extract_process_mining_indicators(decode_event_log(event_df[mining_columns]), log_name,
+                                                      mining_output_dir, replay_mode, render_mode, results_db,
+                                                      approximation)
+    return output_files
+
+# Function to check whether both stages recorded an event log file in the results table
+def log_is_recorded(file_path, results_db):
+    log_name = event_log_name(file_path)
+    return (has_log(results_db, event_log_kpis_stage, log_name)
+            and has_log(results_db, conformance_stage, log_name))
+
+# Function to analyze all event logs in the input directory
+def process_all_files(input_dir, kpi_output_dir, mining_output_dir, num_workers=default_num_workers,
+                      use_build_cache=True, results_db=default_results_db):
+    # Ensure the output directories exist
+    for output_dir in (kpi_output_dir, mining_output_dir):
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+
+    # Loop through all event log files in the input directory
+    file_paths = directory_index(input_dir, input_extension).file_paths()
+    # Only process the event logs that changed since the last run
+    settings = {'input_extension': input_extension, 'start_activity': start_activity, 'end_activity': end_activity,
+                'vehicle_activity_pattern': vehicle_activity_pattern, 'utilization_mode': utilization_mode,
+                'replay_mode': replay_mode, 'approximation': approximation, 'render_mode': render_mode}
+    cache = BuildCache(mining_output_dir, "02_03_combined_analysis", settings, enabled=use_build_cache)
+    # Event logs that are missing from the results table are processed again as well
+    is_recorded = partial(log_is_recorded, results_db=results_db)
+    results = run_stale_files(cache, partial(analyze_file, kpi_output_dir=kpi_output_dir,
+                                             mining_output_dir=mining_output_dir, replay_mode=replay_mode,
+                                             render_mode=render_mode, results_db=results_db,
+                                             approximation=approximation),
+                              file_paths, num_workers, description="Analyzed", is_recorded=is_recorded)
+
+    # Render the Petri nets once all metrics have been written
+    if render_mode == "deferred":
+        render_all_models(mining_output_dir, num_workers)
+    return results
+
+# Start the procedure when running the script
+if __name__ == "__main__":
+    process_all_files(input_dir, kpi_output_dir, mining_output_dir, num_workers, use_build_cache, results_db)
@@ -12,123 +12,79 @@ Outputs: A summary file saved in an output directory, containing calculated indi
 """
 
 import pm4py
-import pandas as pd
 import os
+from functools import partial
 from pm4py.statistics.traces.generic.log import case_statistics
+from event_log_store import event_log_name, read_event_log
+from kpi_engine import (default_end_activity, default_start_activity, default_utilization_mode,
+                        default_vehicle_activity_pattern, extract_event_log_indicators, kpi_columns)
+from build_cache import BuildCache, run_stale_files
+from dataset_index import directory_index, kpi_output_dir, processed_input_dir
+from parallel_runner import default_num_workers
+from instrumentation import measure
+from results_store import default_results_db, event_log_kpis_stage, has_log
 
 # Define the input and output directories
-input_dir = "02_processed_input"
-output_dir = "03_event_logs_KPIs"
-
-# Ensure the output directory exists
-if not os.path.exists(output_dir):
-    os.makedirs(output_dir)
-
-# Loop through all .xes files in the "output" directory
-for file_name in os.listdir(input_dir):
-    if file_name.endswith(".xes"):
-        # Load the event log
-        file_path = os.path.join(input_dir, file_name)
-        event_log = pm4py.read_xes(file_path)
-
-        # Convert event log to DataFrame
-        event_df = pm4py.convert_to_dataframe(event_log)
-
-        # Ensure 'case:concept:name' column is present
-        if 'case:concept:name' not in event_df.columns:
-            print(f"'case:concept:name' column not found in {file_name}, skipping.")
-            continue
-
-        # Initialize a list to store durations
-        durations = []
-
-        # Group by cases
-        for case_id, group in event_df.groupby('case:concept:name'):
-            # Get the timestamp where 'concept:name' == 'productCallsForTransportRegion1'
-            start_events = group[group['concept:name'] == 'productCallsForTransportRegion1']
-            if start_events.empty:
-                # No start event for this case, skip
-                continue
-            start_time = start_events['time:timestamp'].min()
-
-            # Get the timestamp where 'concept:name' == 'droppedOffRegion3'
-            end_events = group[group['concept:name'] == 'droppedOffRegion3']
-            if end_events.empty:
-                # No end event for this case, skip
-                continue
-            end_time = end_events['time:timestamp'].max()
-
-            # Compute duration in seconds
-            duration = (end_time - start_time).total_seconds()
-            durations.append(duration)
-
-        # Compute average cycle time
-        if durations:
-            avg_cycle_time = sum(durations) / len(durations)
-        else:
-            avg_cycle_time = 0
-
-        # Filter events that involve vehicle activities
-        vehicle_df = event_df[
-            event_df['concept:name'].str.contains(r'assignedToVehicle|pickedUp|droppedOff', case=False, na=False)
-        ]
-
-        # If there are no vehicle events, skip this log
-        if vehicle_df.empty:
-            print(f"No vehicle events found in {file_name}, skipping.")
-            continue
-
-        # Ensure 'org:resource' and 'time:timestamp' columns are present
-        if 'org:resource' not in vehicle_df.columns or 'time:timestamp' not in vehicle_df.columns:
-            print(f"Necessary columns not found in {file_name}, skipping.")
-            continue
-
-        # Get unique vehicles involved in the event log
-        unique_vehicles = vehicle_df['org:resource'].unique()
-
-        # Initialize a dictionary to store utilization time per vehicle
-        vehicle_utilization = {}
-
-        # Calculate utilization time for each vehicle
-        for vehicle in unique_vehicles:
-            vehicle_subset = vehicle_df[vehicle_df['org:resource'] == vehicle]
-            # Calculate the time vehicle was active
-            utilization_time = vehicle_subset['time:timestamp'].max() - vehicle_subset['time:timestamp'].min()
-            vehicle_utilization[vehicle] = utilization_time.total_seconds()
-
-        # Convert to DataFrame for easier analysis
-        vehicle_utilization_df = pd.DataFrame.from_dict(
-            vehicle_utilization, orient='index', columns=['UtilizationTime']
-        )
-
-        # Calculate total time span in the event log
-        total_time_span = event_df['time:timestamp'].max() - event_df['time:timestamp'].min()
-        total_time_span = total_time_span.total_seconds()
-
-        # Check for zero total time span to avoid division by zero
-        if total_time_span == 0:
-            print(f"Total time span is zero in {file_name}, skipping.")
-            continue
-
-        # Calculate the utilization rate for each vehicle (utilization time / total event log time span)
-        vehicle_utilization_df['UtilizationRate'] = vehicle_utilization_df['UtilizationTime'] / total_time_span
-
-        # Calculate the average utilization rate for all vehicles
-        average_utilization_rate = vehicle_utilization_df['UtilizationRate'].mean()
-
-        # Prepare the output file name
-        output_file_name = os.path.join(output_dir, f"{os.path.splitext(file_name)[0]}.txt")
-
-        # Write the results to a text file
-        with open(output_file_name, 'w') as f:
-            f.write(f"Average Product Cycle Time: {avg_cycle_time:.2f} seconds\n")
-            f.write(f"Average Resource Utilization Rate (Vehicles): {average_utilization_rate:.4f}\n\n")
-            f.write("Utilization Time and Rate for each vehicle:\n")
-            for vehicle, row in vehicle_utilization_df.iterrows():
-                f.write(
-                    f"Vehicle {vehicle}: Utilization Time: {row['UtilizationTime']:.2f} seconds, "
-                    f"Utilization Rate: {row['UtilizationRate']:.4f}\n"
-                )
-
-        # Display success message
-        print(f"Processed {file_name}, results saved to {output_file_name}")
+input_dir = processed_input_dir
+output_dir = kpi_output_dir
+
+# Event log format to read: ".xes", ".xes.gz" or ".parquet" (columnar store written by 01_convert_to_xes.py)
+input_extension = ".xes"
+
+# Activities that start and end a product's cycle, and the (regular expression) activities that involve a vehicle
+start_activity = default_start_activity
+end_activity = default_end_activity
+vehicle_activity_pattern = default_vehicle_activity_pattern
+
+# Vehicle utilization: time between the first and the last vehicle event ("span") or merged busy intervals from
+# assignment to drop-off, with idle time and concurrency profile ("busy")
+utilization_mode = default_utilization_mode
+
+# Number of event logs processed in parallel (1 processes the logs one by one in this process)
+num_workers = default_num_workers
+
+# Skip the event logs whose content and settings did not change since the last run
+use_build_cache = True
+
+# SQLite results table that stages 04 to 06 read the metrics from
+results_db = default_results_db
+
+# Function to extract the KPIs of a single event log file
+def extract_indicators(file_path, output_dir, results_db=None):
+    # Load the event log as a DataFrame
+    file_name = os.path.basename(file_path)
+    # The columnar store only reads the KPI columns from disk
+    with measure("read_event_log", file_name) as measurement:
+        event_df = read_event_log(file_path, columns=kpi_columns)
+        measurement.count_events(event_df)
+    with measure("kpis", file_name) as measurement:
+        measurement.count_events(event_df)
+        return extract_event_log_indicators(event_df, event_log_name(file_path), output_dir, start_activity,
+                                            end_activity, vehicle_activity_pattern, results_db,
+                                            utilization_mode)
+
+# Function to check whether the KPIs of an event log file are in the results table
+def log_is_recorded(file_path, results_db):
+    return has_log(results_db, event_log_kpis_stage, event_log_name(file_path))
+
+# Function to extract the KPIs of all event logs in the input directory
+def process_all_files(input_dir, output_dir, num_workers=default_num_workers, use_build_cache=True,
+                      results_db=default_results_db):
+    # Ensure the output directory exists
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    # Loop through all event log files in the "output" directory
+    file_paths = directory_index(input_dir, input_extension).file_paths()
+    # Only process the event logs that changed since the last run
+    settings = {'input_extension': input_extension, 'start_activity': start_activity, 'end_activity': end_activity,
+                'vehicle_activity_pattern': vehicle_activity_pattern, 'utilization_mode': utilization_mode}
+    cache = BuildCache(output_dir, "02_extract_event_log_indicators", settings, enabled=use_build_cache)
+    # Event logs that are missing from the results table are processed again as well
+    is_recorded = partial(log_is_recorded, results_db=results_db)
+    return run_stale_files(cache, partial(extract_indicators, output_dir=output_dir, results_db=results_db),
+                           file_paths, num_workers, description="Extracted KPIs from", is_recorded=is_recorded)
+
+# Start the procedure when running the script
+if __name__ == "__main__":
+    process_all_files(input_dir, output_dir, num_workers, use_build_cache, results_db)
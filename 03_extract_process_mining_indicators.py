@@ -6,74 +6,235 @@ Created on October 25 2024
 Script: 03_extract_process_mining_indicators.py
 Purpose: This script performs process discovery on XES event logs, creating process models using the Inductive Miner. 
          It exports the discovered Petri net models in PNML format and generates visualizations as PNG images.
+         With discovery per experiment, a model is discovered once per experiment from the merged directly-follows
+         graphs of its runs, and every run is checked against the model of its experiment.
 Inputs: XES files from a specified input directory.
 Outputs: PNML files containing the discovered Petri nets and corresponding PNG images for visual representation, 
          all saved in an output directory.
 """
 
-import pm4py
 import os
+from functools import partial
 
+import pm4py
 from pm4py.objects.petri_net.exporter import exporter as pnml_exporter
 from pm4py.visualization.petri_net import visualizer as pn_visualizer
 
+from build_cache import BuildCache, run_stale_files
+from conformance import (check_conformance, dfg_cache_folder, directly_follows_counts,
+                         extract_process_mining_indicators, merge_directly_follows_counts, mining_columns,
+                         save_directly_follows_counts)
+from dataset_index import directory_index, mining_output_dir, processed_input_dir
+from event_log_store import event_log_name, read_event_log
+from parallel_runner import default_num_workers, run_parallel
+from render_petri_nets import render_all_models
+from results_store import conformance_stage, default_results_db, has_log, parse_experiment_run
+from instrumentation import measure
+
 # Define the input and output directories
-input_dir = "02_processed_input"
-output_dir = "04_process_discovery_conformance"
-
-# Ensure the output directory exists
-if not os.path.exists(output_dir):
-    os.makedirs(output_dir)
-
-# Loop through all .xes files in the "output" directory
-for file_name in os.listdir(input_dir):
-    if file_name.endswith(".xes"):
-        print(f"Processing file: {file_name}")
-        # Load the event log
-        file_path = os.path.join(input_dir, file_name)
-        event_log = pm4py.read_xes(file_path)
-
-        # Discover the process model using the Inductive Miner
-        net, initial_marking, final_marking = pm4py.discover_petri_net_inductive(event_log)
-
-        # Save the process model (Petri net) to PNML file
-        output_model_file = os.path.join(
-            output_dir, f"{os.path.splitext(file_name)[0]}.pnml"
-        )
-        pnml_exporter.apply(net, initial_marking, output_model_file)
-
-        # Visualize and save the Petri net as an image
-        output_image_file = os.path.join(
-            output_dir, f"{os.path.splitext(file_name)[0]}.png"
-        )
-        gviz = pn_visualizer.apply(net, initial_marking, final_marking)
-        pn_visualizer.save(gviz, output_image_file)
-
-        # Compute fitness using token-based replay
-        fitness_tbr = pm4py.fitness_token_based_replay(
-            event_log, net, initial_marking, final_marking
-        )
-
-        # Print the fitness_tbr dictionary to inspect its contents
-        print("Fitness TBR Dictionary:", fitness_tbr)
-
-        # Access the fitness value using the correct key
-        average_fitness_tbr = fitness_tbr['percentage_of_fitting_traces']
-
-        # Compute precision using token-based replay
-        precision_tbr = pm4py.precision_token_based_replay(
-            event_log, net, initial_marking, final_marking
-        )
-
-        # Prepare the output metrics file name
-        output_metrics_file = os.path.join(
-            output_dir, f"{os.path.splitext(file_name)[0]}_metrics.txt"
-        )
-
-        # Write the metrics to a text file
-        with open(output_metrics_file, "w") as f:
-            f.write(f"Fitness (Token-Based Replay): {average_fitness_tbr:.2f}%\n")
-            f.write(f"Precision (Token-Based Replay): {precision_tbr:.4f}\n")
-
-        # Display success message
-        print(f"Process model and metrics saved for {file_name}")
+input_dir = processed_input_dir
+output_dir = mining_output_dir
+
+# Event log format to read: ".xes", ".xes.gz" or ".parquet" (columnar store written by 01_convert_to_xes.py)
+input_extension = ".xes"
+
+# Process discovery per event log ("run") or once per experiment from the merged directly-follows graphs of its
+# runs ("experiment"); with "experiment" every run is checked against the model of its experiment
+discovery_scope = "run"
+
+# Token-based replay per distinct variant with cached results ("variants") or over every trace with pm4py ("log");
+# both give the same fitness and precision. "approximate" estimates them from a sample of the cases, stratified by
+# variant, until the confidence intervals are within the tolerance (for screening; the intervals and sample size
+# are written to the metrics files)
+replay_mode = "variants"
+
+# Confidence level and interval half-width (fitness as a fraction) of the approximate replay mode
+approximation = {'confidence': 0.95, 'tolerance': 0.01}
+
+# Also compute fitness and precision with alignments, once per variant and cached per model, next to the token-based
+# replay metrics; alignments handle the loops of the discovered models better but are much slower
+compute_alignments = False
+
+# Rendering of the Petri nets to PNG: "inline" (while computing the metrics), "deferred" (in a worker pool after all
+# metrics have been written, skipping models whose structure was already rendered) or "off" (run
+# render_petri_nets.py on demand)
+render_mode = "deferred"
+
+# Number of event logs processed in parallel (1 processes the logs one by one in this process)
+num_workers = default_num_workers
+
+# Number of processes that compute the alignments of an event log; the event logs are already processed in parallel
+# when num_workers > 1
+alignment_num_workers = 1 if num_workers > 1 else default_num_workers
+
+# Skip the event logs whose content and settings did not change since the last run
+use_build_cache = True
+
+# SQLite results table that stages 04 to 06 read the metrics from
+results_db = default_results_db
+
+# Function to discover the process model of a single event log file and compute its conformance metrics
+def process_file(file_path, output_dir, replay_mode="variants", render_mode="deferred", results_db=None,
+                 approximation=None, compute_alignments=False, alignment_num_workers=1):
+    file_name = os.path.basename(file_path)
+    print(f"Processing file: {file_name}")
+    # Load the event log
+    with measure("read_event_log", file_name) as measurement:
+        event_log = read_event_log(file_path, columns=mining_columns, categorical=False)
+        measurement.count_events(event_log)
+    return extract_process_mining_indicators(event_log, event_log_name(file_path), output_dir, replay_mode,
+                                             render_mode, results_db, approximation, compute_alignments,
+                                             alignment_num_workers)
+
+# Function to get the name of the model an event log is checked against with discovery per experiment; event logs
+# without an experiment in their name get a model of their own
+def experiment_model_name(file_path):
+    log_name = event_log_name(file_path)
+    experiment, _ = parse_experiment_run(log_name)
+    return log_name if experiment is None else f"Exp{experiment}"
+
+# Function to remove the models and images that the other discovery scope wrote for the given event log files
+# (Exp{n}Run{m} per run, Exp{n} per experiment), so that the output directory only holds models of the active scope
+def remove_other_scope_models(file_paths, output_dir, scope):
+    run_models = {event_log_name(file_path) for file_path in file_paths}
+    experiment_models = {experiment_model_name(file_path) for file_path in file_paths}
+    other_models = experiment_models - run_models if scope == "run" else run_models - experiment_models
+    for model_name in sorted(other_models):
+        for extension in (".pnml", ".png"):
+            path = os.path.join(output_dir, f"{model_name}{extension}")
+            if os.path.exists(path):
+                os.remove(path)
+                print(f"Removed {path}, which belongs to the other discovery scope.")
+
+# Function to get the path of the cached directly-follows graph of an event log file
+def dfg_cache_path(file_path, output_dir):
+    log_name = event_log_name(file_path)
+    return os.path.join(output_dir, dfg_cache_folder, f"{log_name}.json")
+
+# Function to compute and cache the directly-follows graph of a single event log file
+def cache_directly_follows_counts(file_path, output_dir):
+    # The directly-follows graph is computed on the compact log; only pm4py needs plain string columns
+    with measure("read_event_log", os.path.basename(file_path)) as measurement:
+        event_log = read_event_log(file_path, columns=mining_columns)
+        measurement.count_events(event_log)
+    output_path = dfg_cache_path(file_path, output_dir)
+    with measure("directly_follows_graph", os.path.basename(file_path)) as measurement:
+        save_directly_follows_counts(directly_follows_counts(event_log), output_path)
+        measurement.count_events(event_log)
+    return [output_path]
+
+# Function to discover the model of an experiment from the cached directly-follows graphs of its runs
+def discover_experiment_model(item, render_mode="deferred"):
+    model_path, dfg_paths = item
+    with measure("discovery", os.path.basename(model_path)):
+        dfg, _ = merge_directly_follows_counts(dfg_paths)
+        net, initial_marking, final_marking = pm4py.discover_petri_net_inductive(dfg)
+        pnml_exporter.apply(net, initial_marking, model_path, final_marking=final_marking)
+    output_files = [model_path]
+
+    # Visualize and save the Petri net as an image
+    if render_mode == "inline":
+        output_image_file = f"{os.path.splitext(model_path)[0]}.png"
+        with measure("render", os.path.basename(model_path)):
+            gviz = pn_visualizer.apply(net, initial_marking, final_marking)
+            pn_visualizer.save(gviz, output_image_file)
+        output_files.append(output_image_file)
+    return output_files
+
+# Function to check a single event log file against the model of its experiment
+def check_file_against_experiment_model(file_path, output_dir, replay_mode="variants", results_db=None,
+                                        approximation=None, compute_alignments=False, alignment_num_workers=1):
+    file_name = os.path.basename(file_path)
+    print(f"Checking file: {file_name}")
+    with measure("read_event_log", file_name) as measurement:
+        event_log = read_event_log(file_path, columns=mining_columns, categorical=False)
+        measurement.count_events(event_log)
+    model_path = os.path.join(output_dir, f"{experiment_model_name(file_path)}.pnml")
+    net, initial_marking, final_marking = pm4py.read_pnml(model_path)
+    return check_conformance(event_log, event_log_name(file_path), output_dir, net, initial_marking,
+                             final_marking, replay_mode, results_db, approximation, compute_alignments,
+                             alignment_num_workers)
+
+# Function to discover one model per experiment and check every run against it. The directly-follows graphs and the
+# models are only recomputed for the runs and experiments that changed
+def process_experiments(file_paths, output_dir, num_workers=default_num_workers, use_build_cache=True,
+                        results_db=default_results_db, is_recorded=None):
+    # Directly-follows graph per run
+    dfg_cache = BuildCache(output_dir, "03_directly_follows_graphs", {'input_extension': input_extension},
+                           enabled=use_build_cache)
+    run_stale_files(dfg_cache, partial(cache_directly_follows_counts, output_dir=output_dir), file_paths, num_workers,
+                    description="Computed directly-follows graphs of")
+
+    # Model per experiment, discovered from the merged graphs of its runs
+    experiments = {}
+    for file_path in file_paths:
+        if os.path.exists(dfg_cache_path(file_path, output_dir)):
+            model_path = os.path.join(output_dir, f"{experiment_model_name(file_path)}.pnml")
+            experiments.setdefault(model_path, []).append(dfg_cache_path(file_path, output_dir))
+    model_cache = BuildCache(output_dir, "03_experiment_models", {'render_mode': render_mode}, enabled=use_build_cache)
+    stale_models = [(model_path, dfg_paths) for model_path, dfg_paths in experiments.items()
+                    if not model_cache.is_up_to_date(os.path.basename(model_path), dfg_paths)]
+    for result in run_parallel(partial(discover_experiment_model, render_mode=render_mode), stale_models, num_workers,
+                               description="Discovered",
+                               item_label=lambda item: os.path.splitext(os.path.basename(item[0]))[0]):
+        if result.error is None:
+            model_path, dfg_paths = result.item
+            model_cache.record(os.path.basename(model_path), dfg_paths, result.value)
+    model_cache.save()
+
+    # Conformance of every run against the model of its experiment
+    settings = {'input_extension': input_extension, 'replay_mode': replay_mode, 'approximation': approximation,
+                'compute_alignments': compute_alignments}
+    cache = BuildCache(output_dir, "03_experiment_conformance", settings, enabled=use_build_cache)
+    file_paths = [file_path for file_path in file_paths if os.path.exists(dfg_cache_path(file_path, output_dir))]
+    return run_stale_files(cache, partial(check_file_against_experiment_model, output_dir=output_dir,
+                                          replay_mode=replay_mode, results_db=results_db,
+                                          approximation=approximation, compute_alignments=compute_alignments,
+                                          alignment_num_workers=alignment_num_workers),
+                           file_paths, num_workers, description="Checked", is_recorded=is_recorded,
+                           dependencies=lambda file_path: [
+                               os.path.join(output_dir, f"{experiment_model_name(file_path)}.pnml")])
+
+# Function to check whether the conformance metrics of an event log file are in the results table
+def log_is_recorded(file_path, results_db):
+    return has_log(results_db, conformance_stage, event_log_name(file_path))
+
+# Function to process all event logs in the input directory
+def process_all_files(input_dir, output_dir, num_workers=default_num_workers, use_build_cache=True,
+                      results_db=default_results_db):
+    # Ensure the output directory exists
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    # Loop through all event log files in the "output" directory
+    file_paths = directory_index(input_dir, input_extension).file_paths()
+    # Event logs that are missing from the results table are processed again as well
+    is_recorded = partial(log_is_recorded, results_db=results_db)
+    if discovery_scope in ("run", "experiment"):
+        remove_other_scope_models(file_paths, output_dir, discovery_scope)
+
+    if discovery_scope == "experiment":
+        results = process_experiments(file_paths, output_dir, num_workers, use_build_cache, results_db, is_recorded)
+    elif discovery_scope == "run":
+        # Only process the event logs that changed since the last run
+        settings = {'input_extension': input_extension, 'replay_mode': replay_mode,
+                    'approximation': approximation, 'compute_alignments': compute_alignments,
+                    'render_mode': render_mode}
+        cache = BuildCache(output_dir, "03_extract_process_mining_indicators", settings, enabled=use_build_cache)
+        results = run_stale_files(cache, partial(process_file, output_dir=output_dir, replay_mode=replay_mode,
+                                                 render_mode=render_mode, results_db=results_db,
+                                                 approximation=approximation, compute_alignments=compute_alignments,
+                                                 alignment_num_workers=alignment_num_workers),
+                                  file_paths, num_workers, description="Discovered and checked",
+                                  is_recorded=is_recorded)
+    else:
+        raise ValueError(f"Unknown discovery scope '{discovery_scope}', expected 'run' or 'experiment'.")
+
+    # Render the Petri nets once all metrics have been written
+    if render_mode == "deferred":
+        render_all_models(output_dir, num_workers)
+    return results
+
+# Start the procedure when running the script
+if __name__ == "__main__":
+    process_all_files(input_dir, output_dir, num_workers, use_build_cache, results_db)
@@ -6,61 +6,88 @@ Created on October 25 2024
 Script: 04_summaries_per_experiment.py
 Purpose: This script consolidates metrics and cycle time data from multiple experiments and runs, generating a summary 
          file for each experiment. The summary includes metrics and cycle times per run.
-Inputs: Text files for metrics and cycle times, organized by experiment and run in two separate directories.
+Inputs: The metrics and cycle times per experiment and run in the SQLite results table written by stages 02 and 03.
 Outputs: A summary text file per experiment, aggregating relevant metrics and cycle times for each run, saved in 
          an output directory.
 """
 
 import os
 
-# Directories for the input files
-metrics_dir = "04_process_discovery_conformance"
-cycle_time_dir = "03_event_log_KPIs"
-output_dir = "05_summaries_per_experiment"
+from build_cache import BuildCache
+from dataset_index import results_index, summaries_dir
+from results_store import (conformance_stage, default_results_db, event_log_kpis_stage, format_conformance_metrics,
+                           format_cycle_time, read_run_metrics)
 
-# Create the output directory if it does not exist
-if not os.path.exists(output_dir):
-    os.makedirs(output_dir)
+# Results table written by stages 02 and 03, and the output directory
+results_db = default_results_db
+output_dir = summaries_dir
 
-# Number of experiments and runs
-num_experiments = 27
-num_runs = 20
+# Only regenerate the summaries when the results table changed since the last run
+use_build_cache = True
 
-# Process each experiment
-for exp in range(1, num_experiments + 1):
-    # Create a new file for each experiment
-    output_file_path = os.path.join(output_dir, f"Exp{exp}_summary.txt")
-    
+# Function to write the summary file of a single experiment from the results per (experiment, run), for the runs of
+# the experiment in the index
+def write_experiment_summary(exp, results, output_file_path, index):
     with open(output_file_path, 'w') as output_file:
         output_file.write(f"Experiment {exp} Overview\n")
         output_file.write("=" * 50 + "\n")
         
         # Process each run
-        for run in range(1, num_runs + 1):
-            # File names for metrics and cycle time
-            metrics_file = os.path.join(metrics_dir, f"Exp{exp}Run{run}_metrics.txt")
-            cycle_time_file = os.path.join(cycle_time_dir, f"Exp{exp}Run{run}.txt")
+        for run in index.runs(exp):
+            # Metrics and cycle time of the run
+            run_results = results.get((exp, run), {})
+            metrics = run_results.get(conformance_stage, {})
+            kpis = run_results.get(event_log_kpis_stage, {})
             
             output_file.write(f"Run {run}:\n")
             
-            # Extract and write the metrics data
-            if os.path.exists(metrics_file):
-                with open(metrics_file, 'r') as mf:
-                    metrics_data = mf.read().strip()
-                    output_file.write("Metrics:\n")
-                    output_file.write(metrics_data + "\n")
+            # Write the metrics data
+            if 'fitness_tbr' in metrics and 'precision_tbr' in metrics:
+                output_file.write("Metrics:\n")
+                output_file.write(format_conformance_metrics(metrics).strip() + "\n")
             else:
                 output_file.write("Metrics: File not found\n")
             
-            # Extract and write the product cycle time data
-            if os.path.exists(cycle_time_file):
-                with open(cycle_time_file, 'r') as cf:
-                    cycle_time_data = cf.readline().strip()
-                    output_file.write("Product Cycle Time:\n")
-                    output_file.write(cycle_time_data + "\n")
+            # Write the product cycle time data
+            if 'average_cycle_time' in kpis:
+                output_file.write("Product Cycle Time:\n")
+                output_file.write(format_cycle_time(kpis['average_cycle_time']) + "\n")
             else:
                 output_file.write("Product Cycle Time: File not found\n")
             
             output_file.write("-" * 50 + "\n")
 
-print("Summary files generated in the 'final' directory.")
+# Function to write the summary files of all experiments
+def summarize_experiments(use_build_cache=True, results_db=default_results_db):
+    # Create the output directory if it does not exist
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    if not os.path.exists(results_db):
+        print(f"Results table '{results_db}' not found; run stages 02 and 03 first.")
+        return
+    cache = BuildCache(output_dir, "04_summaries_per_experiment", enabled=use_build_cache)
+    input_files = [results_db]
+    if cache.is_up_to_date("summaries", input_files):
+        print(f"Summary files in '{output_dir}' are up to date.")
+        return
+
+    # Read the results of all experiments and runs in one query, and index the experiments and runs they contain
+    results = read_run_metrics(results_db)
+    index = results_index(results)
+
+    # Process each experiment
+    output_files = []
+    for exp in index.experiments():
+        # Create a new file for each experiment
+        output_file_path = os.path.join(output_dir, f"Exp{exp}_summary.txt")
+        write_experiment_summary(exp, results, output_file_path, index)
+        output_files.append(output_file_path)
+    cache.record("summaries", input_files, output_files)
+    cache.save()
+
+    print("Summary files generated in the 'final' directory.")
+
+# Start the procedure when running the script
+if __name__ == "__main__":
+    summarize_experiments(use_build_cache, results_db)
@@ -4,75 +4,80 @@ Created on October 25 2024
 @author: Rob Bemthuis
 
 Script: 05_combined_summaries.py
-Purpose: This script consolidates summary data from multiple experiments by extracting relevant metrics such as 
-         precision and average product cycle time from experiment summaries. It then compiles these metrics into 
-         a single overview file.
-Inputs: Text summary files, organized by experiment, containing metrics and cycle time data.
+Purpose: This script consolidates the results of multiple experiments by collecting relevant metrics such as 
+         precision and average product cycle time per run. It then compiles these metrics into a single overview
+         file.
+Inputs: The metrics per experiment and run in the SQLite results table written by stages 02 and 03.
 Outputs: A combined text file that consolidates all experiment results, highlighting metrics for each run across 
          experiments, saved in a specified output directory.
 """
 
 import os
-import re
 
-# Directory containing the summary files
-final_dir = "05_summaries_per_experiment"
+from build_cache import BuildCache
+from dataset_index import results_index, summaries_dir
+from results_store import conformance_stage, default_results_db, event_log_kpis_stage, read_run_metrics
+
+# Results table written by stages 02 and 03, and the directory for the combined results
+results_db = default_results_db
+final_dir = summaries_dir
 output_file_path = os.path.join(final_dir, "combined_results.txt")
 
-# Regular expressions to extract precision and cycle time
-precision_pattern = re.compile(r"Precision \(Token-Based Replay\): ([0-9.]+)")
-cycle_time_pattern = re.compile(r"Average Product Cycle Time: ([0-9.]+) seconds")
+# Only combine the results again when the results table changed since the last run
+use_build_cache = True
 
-# Initialize a list to hold all results
-results = []
+# Function to combine the results of all experiments into one file
+def combine_summaries(use_build_cache=True, results_db=default_results_db):
+    if not os.path.exists(final_dir):
+        os.makedirs(final_dir)
+    if not os.path.exists(results_db):
+        print(f"Results table '{results_db}' not found; run stages 02 and 03 first.")
+        return
+    cache = BuildCache(final_dir, "05_combined_summaries", enabled=use_build_cache)
+    input_files = [results_db]
+    if cache.is_up_to_date("combined_results", input_files):
+        print(f"Combined results in '{output_file_path}' are up to date.")
+        return
 
-# Number of experiments and runs
-num_experiments = 27
-num_runs = 20
+    # Read the results of all experiments and runs in one query
+    run_metrics = read_run_metrics(results_db)
+    index = results_index(run_metrics)
+    experiments = index.experiments()
 
-# Iterate over each experiment
-for exp in range(1, num_experiments + 1):
-    summary_file_path = os.path.join(final_dir, f"Exp{exp}_summary.txt")
-    
-    if not os.path.exists(summary_file_path):
-        print(f"Summary file for Experiment {exp} not found.")
-        continue  # Skip to the next experiment if the file is missing
-    
-    with open(summary_file_path, 'r') as summary_file:
-        content = summary_file.read()
-    
-    # Split the content by runs using the separator lines
-    runs_data = content.split("-" * 50 + "\n")
+    # Initialize a list to hold all results
+    results = []
+
+    # Iterate over each experiment up to the highest one in the results; missing experiments are reported
+    for exp in range(1, experiments[-1] + 1 if experiments else 1):
+        if not index.runs(exp):
+            print(f"Results for Experiment {exp} not found.")
+            continue  # Skip to the next experiment if it has no results
     
-    for run_data in runs_data:
-        # Extract run number
-        run_match = re.search(r"Run (\d+):", run_data)
-        if not run_match:
-            continue  # Skip if run number is not found
-        run_number = int(run_match.group(1))
+        for run_number in index.runs(exp):
+            run_results = run_metrics.get((exp, run_number), {})
         
-        # Extract precision
-        precision_match = precision_pattern.search(run_data)
-        if precision_match:
-            precision = precision_match.group(1)
-        else:
-            precision = "N/A"
+            # Precision, formatted as in the metrics report
+            precision = run_results.get(conformance_stage, {}).get('precision_tbr')
+            precision = f"{precision:.4f}" if precision is not None else "N/A"
         
-        # Extract average product cycle time
-        cycle_time_match = cycle_time_pattern.search(run_data)
-        if cycle_time_match:
-            cycle_time = cycle_time_match.group(1)
-        else:
-            cycle_time = "N/A"
+            # Average product cycle time, formatted as in the KPI report
+            cycle_time = run_results.get(event_log_kpis_stage, {}).get('average_cycle_time')
+            cycle_time = f"{cycle_time:.2f}" if cycle_time is not None else "N/A"
         
-        # Append the extracted data to results
-        results.append(f"{exp};{run_number};{precision};{cycle_time}")
+            # Append the data to results
+            results.append(f"{exp};{run_number};{precision};{cycle_time}")
+
+    # Write all results to the output file
+    with open(output_file_path, 'w') as output_file:
+        # Write header
+        output_file.write("Experiment;Run;Precision;Average_Product_Cycle_Time_Seconds\n")
+        for line in results:
+            output_file.write(line + "\n")
 
-# Write all results to the output file
-with open(output_file_path, 'w') as output_file:
-    # Write header
-    output_file.write("Experiment;Run;Precision;Average_Product_Cycle_Time_Seconds\n")
-    for line in results:
-        output_file.write(line + "\n")
+    print(f"Combined results have been written to '{output_file_path}'.")
+    cache.record("combined_results", input_files, [output_file_path])
+    cache.save()
 
-print(f"Combined results have been written to '{output_file_path}'.")
+# Start the procedure when running the script
+if __name__ == "__main__":
+    combine_summaries(use_build_cache, results_db)
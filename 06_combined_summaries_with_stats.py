@@ -4,99 +4,133 @@ Created on October 25 2024
 @author: Rob Bemthuis
 
 Script: 06_combined_summaries_with_stats.py
-Purpose: This script aggregates and calculates cumulative statistics, including average and standard deviation, 
-         for precision and product cycle times across multiple experiments. It builds on previously summarized 
-         results and provides statistical insights across all runs.
-Inputs: Text summary files from previous experiments, containing precision and cycle time metrics.
+Purpose: This script aggregates and calculates cumulative statistics, including average, standard deviation and
+         confidence interval, for precision, fitness, product cycle times and vehicle utilization across multiple
+         experiments. The statistics are updated per run in constant time (running_stats.py), and the statistics of
+         all experiments are combined from the per-experiment statistics.
+Inputs: The precision and cycle time per experiment and run in the SQLite results table written by stages 02 and 03.
 Outputs: A comprehensive text file that combines metrics with cumulative statistics, providing enhanced insights 
-         across experiments, saved in an output directory.
+         across experiments, and a text file with the final statistics per experiment and over all experiments,
+         saved in an output directory.
 """
 
 import os
-import re
-import statistics
 
-# Directory containing the summary files
-final_dir = "05_summaries_per_experiment"
+from build_cache import BuildCache
+from dataset_index import results_index, summaries_dir
+from results_store import conformance_stage, default_results_db, event_log_kpis_stage, read_run_metrics
+from running_stats import RunningStats
+
+# Results table written by stages 02 and 03, and the directory for the combined results
+results_db = default_results_db
+final_dir = summaries_dir
 output_file_path = os.path.join(final_dir, "combined_results_with_stats.txt")
+experiment_stats_file_path = os.path.join(final_dir, "experiment_stats.txt")
 
-# Regular expressions to extract precision and cycle time
-precision_pattern = re.compile(r"Precision \(Token-Based Replay\): ([0-9.]+)")
-cycle_time_pattern = re.compile(r"Average Product Cycle Time: ([0-9.]+) seconds")
+# Confidence level of the confidence intervals of the cumulative averages
+confidence = 0.95
 
-# Number of experiments and runs
-num_experiments = 27
-num_runs = 20
+# Metrics with cumulative statistics: (name in the output, stage, metric, decimals in the stage reports)
+stats_metrics = [
+    ('Precision', conformance_stage, 'precision_tbr', 4),
+    ('Cycle_Time', event_log_kpis_stage, 'average_cycle_time', 2),
+    ('Fitness', conformance_stage, 'fitness_tbr', 2),
+    ('Utilization_Rate', event_log_kpis_stage, 'average_utilization_rate', 4),
+]
 
-# Open the output file
-with open(output_file_path, 'w') as output_file:
-    # Write header
-    output_file.write("Experiment_Run;Precision;Average_Product_Cycle_Time_Seconds;Cumulative_Average_Precision;Cumulative_StdDev_Precision;Cumulative_Average_Cycle_Time;Cumulative_StdDev_Cycle_Time\n")
+# Only compute the statistics again when the results table changed since the last run
+use_build_cache = True
 
-    # Iterate over each experiment
-    for exp in range(1, num_experiments + 1):
-        summary_file_path = os.path.join(final_dir, f"Exp{exp}_summary.txt")
-        
-        if not os.path.exists(summary_file_path):
-            print(f"Summary file for Experiment {exp} not found.")
-            continue  # Skip to the next experiment if the file is missing
-        
-        with open(summary_file_path, 'r') as summary_file:
-            content = summary_file.read()
-        
-        # Split the content by runs using the separator lines
-        runs_data = content.split("-" * 50 + "\n")
+# Function to format an optional value for the output, "N/A" if it is missing
+def format_value(value):
+    return "N/A" if value is None else f"{value}"
+
+# Function to combine the results of all experiments with cumulative statistics into one file
+def combine_summaries_with_stats(use_build_cache=True, results_db=default_results_db):
+    if not os.path.exists(final_dir):
+        os.makedirs(final_dir)
+    if not os.path.exists(results_db):
+        print(f"Results table '{results_db}' not found; run stages 02 and 03 first.")
+        return
+    cache = BuildCache(final_dir, "06_combined_summaries_with_stats", {'confidence': confidence},
+                       enabled=use_build_cache)
+    input_files = [results_db]
+    if cache.is_up_to_date("combined_results_with_stats", input_files):
+        print(f"Combined results in '{output_file_path}' are up to date.")
+        return
+
+    # Read the results of all experiments and runs in one query
+    run_metrics = read_run_metrics(results_db)
+    index = results_index(run_metrics)
+    experiments = index.experiments()
+    ci_label = f"CI{round(confidence * 100)}_HalfWidth"
+
+    # Statistics of every experiment, and of all experiments together
+    experiment_stats = {}
+    overall_stats = {name: RunningStats() for name, _, _, _ in stats_metrics}
+
+    # Open the output file
+    with open(output_file_path, 'w') as output_file:
+        # Write header; the fitness and utilization columns and the confidence intervals follow the original columns
+        output_file.write(
+            "Experiment_Run;Precision;Average_Product_Cycle_Time_Seconds;Cumulative_Average_Precision;"
+            "Cumulative_StdDev_Precision;Cumulative_Average_Cycle_Time;Cumulative_StdDev_Cycle_Time;"
+            "Fitness;Average_Utilization_Rate;Cumulative_Average_Fitness;Cumulative_StdDev_Fitness;"
+            "Cumulative_Average_Utilization_Rate;Cumulative_StdDev_Utilization_Rate;"
+            + ";".join(f"{ci_label}_{name}" for name, _, _, _ in stats_metrics) + "\n"
+        )
+
+        # Iterate over each experiment up to the highest one in the results; missing experiments are reported
+        for exp in range(1, experiments[-1] + 1 if experiments else 1):
+            if not index.runs(exp):
+                print(f"Results for Experiment {exp} not found.")
+                continue  # Skip to the next experiment if it has no results
         
-        # Initialize lists for cumulative statistics
-        precisions = []
-        cycle_times = []
+            # Initialize the accumulators for cumulative statistics
+            stats = {name: RunningStats() for name, _, _, _ in stats_metrics}
+            experiment_stats[exp] = stats
         
-        for run_data in runs_data:
-            # Extract run number
-            run_match = re.search(r"Run (\d+):", run_data)
-            if not run_match:
-                continue  # Skip if run number is not found
-            run_number = int(run_match.group(1))
-            
-            # Extract precision
-            precision_match = precision_pattern.search(run_data)
-            if precision_match:
-                precision = float(precision_match.group(1))
-                precisions.append(precision)
-            else:
-                precision = "N/A"
-            
-            # Extract average product cycle time
-            cycle_time_match = cycle_time_pattern.search(run_data)
-            if cycle_time_match:
-                cycle_time = float(cycle_time_match.group(1))
-                cycle_times.append(cycle_time)
-            else:
-                cycle_time = "N/A"
-            
-            # Compute cumulative averages and standard deviations
-            if precisions and precision != "N/A":
-                cum_avg_precision = sum(precisions) / len(precisions)
-                if len(precisions) > 1:
-                    cum_stddev_precision = statistics.stdev(precisions)
-                else:
-                    cum_stddev_precision = 0.0  # Standard deviation with one value is zero
-            else:
-                cum_avg_precision = "N/A"
-                cum_stddev_precision = "N/A"
+            for run_number in index.runs(exp):
+                run_results = run_metrics.get((exp, run_number), {})
+                values, cumulative, ci_half_widths = [], [], []
             
-            if cycle_times and cycle_time != "N/A":
-                cum_avg_cycle_time = sum(cycle_times) / len(cycle_times)
-                if len(cycle_times) > 1:
-                    cum_stddev_cycle_time = statistics.stdev(cycle_times)
-                else:
-                    cum_stddev_cycle_time = 0.0
-            else:
-                cum_avg_cycle_time = "N/A"
-                cum_stddev_cycle_time = "N/A"
+                for name, stage, metric, decimals in stats_metrics:
+                    # Value rounded as in the stage reports; the cumulative statistics are only reported for runs
+                    # with a value
+                    value = run_results.get(stage, {}).get(metric)
+                    if value is not None:
+                        value = float(f"{value:.{decimals}f}")
+                        stats[name].add(value)
+                        cumulative += [stats[name].mean, stats[name].stdev()]
+                        ci_half_widths.append(stats[name].ci_half_width(confidence))
+                    else:
+                        cumulative += [None, None]
+                        ci_half_widths.append(None)
+                    values.append(value)
             
-            # Write to output file
-            output_line = f"{exp};{run_number};{precision};{cycle_time};{cum_avg_precision};{cum_stddev_precision};{cum_avg_cycle_time};{cum_stddev_cycle_time}\n"
-            output_file.write(output_line)
+                # Write to output file
+                columns = [exp, run_number] + values[:2] + cumulative[:4] + values[2:] + cumulative[4:] + ci_half_widths
+                output_file.write(";".join(format_value(column) for column in columns) + "\n")
     
-    print(f"Combined results with cumulative statistics have been written to '{output_file_path}'.")
+            for name, _, _, _ in stats_metrics:
+                overall_stats[name].merge(stats[name])
+    
+        print(f"Combined results with cumulative statistics have been written to '{output_file_path}'.")
+
+    # Write the final statistics per experiment and over all experiments, combined from the per-experiment
+    # accumulators
+    with open(experiment_stats_file_path, 'w') as stats_file:
+        stats_file.write("Experiment;Metric;Runs;Average;StdDev;" + ci_label + "\n")
+        for exp, stats in list(experiment_stats.items()) + [("All", overall_stats)]:
+            for name, _, _, _ in stats_metrics:
+                metric_stats = stats[name]
+                columns = [exp, name, metric_stats.count, metric_stats.mean, metric_stats.stdev(),
+                           metric_stats.ci_half_width(confidence)]
+                stats_file.write(";".join(format_value(column) for column in columns) + "\n")
+
+    cache.record("combined_results_with_stats", input_files, [output_file_path, experiment_stats_file_path])
+    cache.save()
+
+# Start the procedure when running the script
+if __name__ == "__main__":
+    combine_summaries_with_stats(use_build_cache, results_db)
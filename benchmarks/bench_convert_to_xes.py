@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 16 2026
+
+Script: benchmarks/bench_convert_to_xes.py
+Purpose: This script measures how the conversion of raw simulation output into an event log scales with the input
+         size. It times the columnar DataFrame path and the full pm4py EventLog construction of 01_convert_to_xes.py
+         on synthetic data and reports the throughput in events per second.
+Inputs: None, the raw data is generated synthetically by synthetic_event_logs.py.
+Outputs: A table with the number of events, wall time and events/sec per input size, printed to the console.
+"""
+
+import importlib
+import os
+import sys
+import time
+
+from synthetic_event_logs import generate_raw_data
+
+# Make the pipeline scripts importable from the benchmark folder
+repository_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repository_dir)
+convert_to_xes = importlib.import_module("01_convert_to_xes")
+
+# Number of events per benchmark step
+input_sizes = [1_000, 10_000, 100_000, 1_000_000]
+
+# Function to time a conversion function and return the events per second
+def benchmark(convert, df):
+    start = time.perf_counter()
+    convert(df)
+    elapsed = time.perf_counter() - start
+    return elapsed, len(df) / elapsed
+
+if __name__ == "__main__":
+    print(f"{'Events':>10} {'DataFrame (s)':>14} {'Events/sec':>12} {'EventLog (s)':>13} {'Events/sec':>12}")
+    for num_events in input_sizes:
+        raw_df = generate_raw_data(num_events)
+        df_time, df_rate = benchmark(convert_to_xes.create_event_log_dataframe, raw_df)
+        log_time, log_rate = benchmark(convert_to_xes.create_event_log, raw_df)
+        print(f"{num_events:>10} {df_time:>14.3f} {df_rate:>12.0f} {log_time:>13.3f} {log_rate:>12.0f}")
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 16 2026
+
+Script: benchmarks/bench_pipeline.py
+Purpose: This script measures how the whole pipeline (stages 01 to 06) scales with the size of the event logs. For
+         every input size it generates synthetic raw files in a temporary working directory, runs each stage as a
+         separate process and reports its wall time, throughput in events per second and peak memory.
+Inputs: None, the raw data is generated synthetically by synthetic_event_logs.py.
+Outputs: A table per input size with the wall time, events/sec and peak memory of every stage, printed to the
+         console and saved as a CSV file (bench_pipeline_results.csv) in the current directory.
+"""
+
+import csv
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic_event_logs import write_experiments
+
+# Directory with the pipeline scripts
+repository_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Total number of events per benchmark step, spread over the runs of one experiment; the generator also supports
+# 10_000_000 events, which takes hours for the process mining stages
+input_sizes = [1_000, 10_000, 100_000, 1_000_000]
+num_runs = 2
+
+# Pipeline stages, in order
+stages = ["01_convert_to_xes.py", "02_extract_event_log_indicators.py", "03_extract_process_mining_indicators.py",
+          "04_summaries_per_experiment.py", "05_combined_summaries.py", "06_combined_summaries_with_stats.py"]
+
+# File with the results of all benchmark steps
+results_file = "bench_pipeline_results.csv"
+
+# Function to run a stage in the working directory and return its wall time and peak memory in MB. The peak memory
+# is the largest resident set size of the stage process or its worker processes, and is only available on POSIX
+# systems
+def run_stage(script, working_dir):
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(repository_dir, script)], cwd=working_dir,
+                               stdout=subprocess.DEVNULL)
+    if hasattr(os, 'wait4'):
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        peak_memory = usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    else:
+        process.wait()
+        peak_memory = None
+    elapsed = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError(f"{script} failed with exit code {process.returncode}")
+    return elapsed, peak_memory
+
+# Function to run all stages on synthetic event logs with the given total number of events
+def benchmark_pipeline(num_events, num_runs=num_runs):
+    results = []
+    with tempfile.TemporaryDirectory() as working_dir:
+        write_experiments(os.path.join(working_dir, "01_raw_input"), 1, num_runs, max(1, num_events // num_runs))
+        for script in stages:
+            elapsed, peak_memory = run_stage(script, working_dir)
+            results.append({'events': num_events, 'stage': script, 'seconds': elapsed,
+                            'events_per_second': num_events / elapsed, 'peak_memory_mb': peak_memory})
+    return results
+
+if __name__ == "__main__":
+    all_results = []
+    print(f"{'Events':>10} {'Stage':<42} {'Wall (s)':>10} {'Events/sec':>12} {'Peak MB':>9}")
+    for num_events in input_sizes:
+        for result in benchmark_pipeline(num_events):
+            peak_memory = "N/A" if result['peak_memory_mb'] is None else f"{result['peak_memory_mb']:.0f}"
+            print(f"{result['events']:>10} {result['stage']:<42} {result['seconds']:>10.3f} "
+                  f"{result['events_per_second']:>12.0f} {peak_memory:>9}")
+            all_results.append(result)
+
+    with open(results_file, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['events', 'stage', 'seconds', 'events_per_second', 'peak_memory_mb'])
+        writer.writeheader()
+        writer.writerows(all_results)
+    print(f"Benchmark results have been written to '{results_file}'.")
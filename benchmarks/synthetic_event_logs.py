@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 16 2026
+
+Script: benchmarks/synthetic_event_logs.py
+Purpose: This script generates synthetic raw simulation output with the columns 01_convert_to_xes.py requires, so
+         the pipeline can be run and benchmarked without the 4TU dataset. Every product follows the transport sequence
+         from Region 1 to Region 3, with one vehicle assigned to, picking up and dropping off the product on each
+         hop, and the events are written in time order. Large files are generated in chunks of products (ordered
+         per chunk), so the memory use does not grow with the file size.
+Inputs: None, the raw data is generated synthetically.
+Outputs: Tab-separated raw files (Exp{experiment}Run{run}.txt) in the output directory.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+# Directory for the generated raw files, the input directory of 01_convert_to_xes.py
+output_dir = "01_raw_input"
+
+# Number of experiments, runs per experiment and events per run to generate
+num_experiments = 1
+num_runs = 2
+events_per_run = 100_000
+
+# Activities of a single product, in order
+activities = ['productCallsForTransportRegion1', 'assignedToVehicleRegion1', 'pickedUpRegion1',
+              'droppedOffRegion2', 'productCallsForTransportRegion2', 'assignedToVehicleRegion2',
+              'pickedUpRegion2', 'droppedOffRegion3']
+
+# Number of products generated at once when writing a raw file
+products_per_chunk = 100_000
+
+# Function to generate a raw DataFrame with the columns create_event_log requires, for the products numbered from
+# first_product_nr onwards
+def generate_raw_data(num_events, seed=0, first_product_nr=1, num_vehicles=10):
+    rng = np.random.default_rng(seed)
+    num_cases = max(1, -(-num_events // len(activities)))
+    case_nrs = np.repeat(np.arange(first_product_nr, first_product_nr + num_cases), len(activities))[:num_events]
+    steps = np.tile(np.arange(len(activities)), num_cases)[:num_events]
+    # Products arrive every few seconds and each step takes up to a minute
+    offsets = case_nrs * 5 + steps * 60 + rng.integers(0, 60, num_events)
+    timestamps = pd.Timestamp("2020-01-01") + pd.to_timedelta(offsets, unit="s")
+    # One vehicle per hop (Region 1 to 2 and Region 2 to 3) of a product; calling for transport involves no vehicle
+    hop_vehicles = rng.integers(1, num_vehicles + 1, (num_cases, 2))
+    vehicles = hop_vehicles[case_nrs - first_product_nr, steps // 4]
+    vehicle_steps = steps % 4 != 0
+    df = pd.DataFrame({
+        'uniqueID': np.arange(len(activities) * (first_product_nr - 1),
+                              len(activities) * (first_product_nr - 1) + num_events),
+        'productNr': case_nrs,
+        'event': np.array(activities)[steps],
+        'timeStamp': timestamps.strftime("%Y-%m-%d %H:%M:%S"),
+        'productType': 'A',
+        'vehicleType': 'AGV',
+        'vehicle': np.where(vehicle_steps, [f"vehicle{v}" for v in vehicles], None),
+        'currentDecayLevel': rng.random(num_events),
+        'processingStation': np.where(steps == 3, 'station1', None),
+        'productIDStr': [f"product{c}" for c in case_nrs],
+        'productID': case_nrs,
+    })
+    # The simulation writes events in time order, which interleaves the cases
+    return df.sort_values('timeStamp', kind='mergesort').reset_index(drop=True)
+
+# Function to write a raw file with the given number of events, generated in chunks of products
+def write_raw_file(file_path, num_events, seed=0):
+    chunk_events = products_per_chunk * len(activities)
+    written = 0
+    with open(file_path, 'w', newline='') as f:
+        while written < num_events:
+            chunk = generate_raw_data(min(chunk_events, num_events - written),
+                                      seed=[*np.atleast_1d(seed).tolist(), written],
+                                      first_product_nr=written // len(activities) + 1)
+            chunk.to_csv(f, sep='\t', index=False, header=written == 0)
+            written += len(chunk)
+    return file_path
+
+# Function to write the raw files of all experiments and runs
+def write_experiments(output_dir, num_experiments, num_runs, events_per_run, seed=0):
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    file_paths = []
+    for exp in range(1, num_experiments + 1):
+        for run in range(1, num_runs + 1):
+            file_path = os.path.join(output_dir, f"Exp{exp}Run{run}.txt")
+            file_paths.append(write_raw_file(file_path, events_per_run, seed=[seed, exp, run]))
+    return file_paths
+
+# Start the procedure when running the script
+if __name__ == "__main__":
+    generated_files = write_experiments(output_dir, num_experiments, num_runs, events_per_run)
+    print(f"Generated {len(generated_files)} raw files with {events_per_run} events each in '{output_dir}'.")
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 16 2026
+
+Module: build_cache.py
+Purpose: This module keeps a manifest per pipeline stage with the content hashes of the input files and the stage
+         settings that produced each output. A stage only recomputes an output when one of its inputs or settings
+         changed, or when the output is missing. Because every stage reads the outputs of the previous stage, a
+         changed output automatically invalidates everything downstream of it.
+Inputs: The input files, output files and settings of a stage.
+Outputs: A JSON manifest (.build_manifest_<stage>.json) in the output directory of the stage.
+"""
+
+import hashlib
+import json
+import os
+
+from parallel_runner import run_parallel
+
+# Function to compute the SHA-256 hash of a file's content
+def file_hash(file_path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+# Function to compute the hash of the stage settings
+def settings_hash(settings):
+    return hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+# Class that decides which outputs of a stage have to be recomputed
+class BuildCache:
+    def __init__(self, output_dir, stage, settings=None, enabled=True):
+        self.manifest_path = os.path.join(output_dir, f".build_manifest_{stage}.json")
+        self.settings = settings_hash(settings or {})
+        self.enabled = enabled
+        self.entries = {}
+        if enabled and os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r') as f:
+                self.entries = json.load(f)
+
+    # Function to describe the current state of an input file; the hash is only recomputed when the size or the
+    # modification time differs from the recorded state
+    def _input_state(self, file_path, recorded=None):
+        stat = os.stat(file_path)
+        if recorded is not None and recorded['size'] == stat.st_size and recorded['mtime_ns'] == stat.st_mtime_ns:
+            return recorded
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': file_hash(file_path)}
+
+    # Function to check whether the outputs recorded for a key are still valid
+    def is_up_to_date(self, key, input_paths):
+        entry = self.entries.get(key)
+        if not self.enabled or entry is None or entry['settings'] != self.settings:
+            return False
+        if sorted(entry['inputs']) != sorted(input_paths):
+            return False
+        if not all(os.path.exists(output_path) for output_path in entry['outputs']):
+            return False
+        for input_path in input_paths:
+            if not os.path.exists(input_path):
+                return False
+            recorded = entry['inputs'][input_path]
+            state = self._input_state(input_path, recorded)
+            if state['sha256'] != recorded['sha256']:
+                return False
+            # Same content with a new modification time, e.g. a regenerated upstream output
+            entry['inputs'][input_path] = state
+        return True
+
+    # Function to record the inputs and outputs of a key after it has been (re)computed
+    def record(self, key, input_paths, output_paths):
+        if not self.enabled:
+            return
+        previous = self.entries.get(key, {}).get('inputs', {})
+        self.entries[key] = {
+            'settings': self.settings,
+            'inputs': {path: self._input_state(path, previous.get(path)) for path in input_paths},
+            'outputs': list(output_paths),
+        }
+
+    # Function to write the manifest; the replace makes sure an interrupted run never leaves a corrupt manifest
+    def save(self):
+        if not self.enabled:
+            return
+        temporary_path = self.manifest_path + ".tmp"
+        with open(temporary_path, 'w') as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(temporary_path, self.manifest_path)
+
+# Function to run a per-file worker only for the files whose outputs are out of date; the worker returns the list
+# of output paths it wrote. The optional is_recorded check marks files as stale whose results are missing elsewhere,
+# e.g. in the results table, and the optional dependencies function gives further input paths of a file, e.g. the
+# process model it is checked against
+def run_stale_files(cache, worker, file_paths, num_workers, description, is_recorded=None, dependencies=None):
+    def input_paths(path):
+        return [path] + (dependencies(path) if dependencies is not None else [])
+
+    stale_paths = [path for path in file_paths
+                   if not cache.is_up_to_date(os.path.basename(path), input_paths(path))
+                   or (is_recorded is not None and not is_recorded(path))]
+    if len(stale_paths) < len(file_paths):
+        print(f"{len(file_paths) - len(stale_paths)} of {len(file_paths)} files are up to date, skipping them.")
+    results = run_parallel(worker, stale_paths, num_workers, description)
+    for result in results:
+        if result.error is None:
+            cache.record(os.path.basename(result.item), input_paths(result.item), result.value or [])
+    cache.save()
+    return results
@@ -0,0 +1,567 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 16 2026
+
+Module: conformance.py
+Purpose: This module contains the process mining steps of stage 03: process discovery with the Inductive Miner,
+         export (and optionally visualization) of the discovered Petri net, and fitness and precision with
+         token-based replay.
+         It is shared by 03_extract_process_mining_indicators.py and 02_03_combined_analysis.py.
+         Token-based replay can be run per distinct variant instead of per trace; the results are weighted with the
+         variant frequencies, which gives exactly the same fitness and precision, and are cached per model so that
+         runs with the same discovered model do not replay the same variants again.
+         Optionally, fitness and precision are also computed with alignments, once per variant (and prefix) in a
+         process pool and cached per model, and written next to the token-based replay metrics.
+         The approximate replay mode samples cases, stratified by variant, until the confidence intervals of fitness
+         and precision are narrower than a requested tolerance, for quick screening of very large logs.
+         For discovery per experiment, the directly-follows graph of every run is cached and the graphs of the runs
+         are added up, so that the Inductive Miner runs once per experiment on the merged graph.
+Inputs: An event log DataFrame with plain string columns.
+Outputs: PNML files, PNG images and metrics text files per event log (or per experiment for the models), a replay
+         (and alignment) cache per model and a directly-follows graph cache per event log.
+"""
+
+import bisect
+import hashlib
+import json
+import math
+import os
+import random
+from collections import Counter
+from functools import partial
+
+import pm4py
+from pm4py.algo.conformance.alignments.petri_net import algorithm as alignment_algorithm
+from pm4py.algo.conformance.tokenreplay.variants import token_replay
+from pm4py.algo.evaluation.precision.variants import align_etconformance
+from pm4py.objects.dfg.obj import DFG
+from pm4py.objects.log.obj import EventLog, Trace, Event
+from pm4py.objects.petri_net.exporter import exporter as pnml_exporter
+from pm4py.objects.petri_net.obj import PetriNet
+from pm4py.objects.petri_net.utils.align_utils import get_visible_transitions_eventually_enabled_by_marking
+from pm4py.visualization.petri_net import visualizer as pn_visualizer
+
+from instrumentation import measure
+from parallel_runner import run_parallel
+from results_store import conformance_stage, format_conformance_metrics, write_run_metrics
+from running_stats import student_t_quantile
+
+# Columns needed for discovery and conformance checking
+mining_columns = ['case:concept:name', 'concept:name', 'time:timestamp']
+
+# Name of the folder (inside the output directory) with the cached replay results per model
+replay_cache_folder = ".replay_cache"
+
+# Name of the folder (inside the output directory) with the cached alignment results per model
+alignment_cache_folder = ".alignment_cache"
+
+# Largest number of variants or prefixes aligned per task of the process pool
+alignment_chunk_size = 50
+
+# Name of the folder (inside the output directory) with the cached directly-follows graph per event log
+dfg_cache_folder = ".dfg_cache"
+
+# Default settings of the approximate replay mode: confidence level and half-width of the intervals to reach
+# (fitness as a fraction), variants with at least census_share of the cases that are replayed exactly, and number
+# of cases sampled per step from the other variants
+default_approximation = {'confidence': 0.95, 'tolerance': 0.01, 'census_share': 0.01, 'batch_size': 200, 'seed': 0}
+
+# Function to compute a hash of the structure of a Petri net and its markings. Visible transitions are identified by
+# their label, so the hash does not depend on generated transition names
+def petri_net_hash(net, initial_marking, final_marking):
+    def node_key(node):
+        if isinstance(node, PetriNet.Transition) and node.label is not None:
+            return f"t:{node.label}"
+        return f"n:{node.name}"
+
+    structure = {
+        'places': sorted(place.name for place in net.places),
+        'transitions': sorted(node_key(transition) for transition in net.transitions),
+        'arcs': sorted(f"{node_key(arc.source)}->{node_key(arc.target)}:{arc.weight}" for arc in net.arcs),
+        'initial_marking': sorted(f"{place.name}:{count}" for place, count in initial_marking.items()),
+        'final_marking': sorted(f"{place.name}:{count}" for place, count in final_marking.items()),
+    }
+    return hashlib.sha256(json.dumps(structure, sort_keys=True).encode('utf-8')).hexdigest()
+
+# Function to sort the events of every case in timestamp order; the stable sort keeps the file order of events with
+# the same timestamp, so the variants and the directly-follows graphs of a log see the same event order
+def sort_case_events(event_df):
+    return event_df.sort_values(['case:concept:name', 'time:timestamp'], kind='mergesort')
+
+# Function to collapse an event log DataFrame into its variants (activity sequences) and their frequencies
+def log_variants(event_df):
+    sequences = sort_case_events(event_df).groupby('case:concept:name', sort=False,
+                                                   observed=True)['concept:name'].agg(tuple)
+    return Counter(sequences.tolist())
+
+# Function to build a pm4py EventLog with one trace per activity sequence
+def sequences_to_event_log(sequences):
+    return EventLog([Trace([Event({'concept:name': activity}) for activity in sequence]) for sequence in sequences])
+
+# Class with the token replay (or alignment) results per variant and per prefix for a single model, stored as a JSON
+# file
+class ReplayCache:
+    def __init__(self, cache_dir, model_hash):
+        self.path = os.path.join(cache_dir, f"{model_hash}.json") if cache_dir else None
+        self.variants, self.prefixes = {}, {}
+        if self.path and os.path.exists(self.path):
+            self._load()
+
+    def _load(self):
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        self.variants.update(data.get('variants', {}))
+        self.prefixes.update(data.get('prefixes', {}))
+
+    @staticmethod
+    def key(sequence):
+        return json.dumps(list(sequence))
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Merge with results written by other workers in the meantime
+        if os.path.exists(self.path):
+            self._load()
+        temporary_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary_path, 'w') as f:
+            json.dump({'variants': self.variants, 'prefixes': self.prefixes}, f)
+        os.replace(temporary_path, self.path)
+
+# Function to replay the variants that are not in the cache yet and store their fitness results
+def replay_variants(variants, net, initial_marking, final_marking, cache):
+    missing = [variant for variant in variants if cache.key(variant) not in cache.variants]
+    if missing:
+        parameters = {
+            token_replay.Parameters.ACTIVITY_KEY: 'concept:name',
+            token_replay.Parameters.CONSIDER_REMAINING_IN_FITNESS: True,
+            token_replay.Parameters.CLEANING_TOKEN_FLOOD: False,
+        }
+        replayed = token_replay.apply(sequences_to_event_log(missing), net, initial_marking, final_marking,
+                                      parameters=parameters)
+        for variant, result in zip(missing, replayed):
+            cache.variants[cache.key(variant)] = {
+                field: result[field] for field in ('trace_is_fit', 'trace_fitness', 'missing_tokens',
+                                                   'consumed_tokens', 'remaining_tokens', 'produced_tokens')
+            }
+
+# Function to replay every variant once and aggregate the fitness as pm4py's token-based replay fitness does
+def variant_fitness_token_based_replay(variants, net, initial_marking, final_marking, cache):
+    replay_variants(variants, net, initial_marking, final_marking, cache)
+
+    # Weight every variant with its number of traces
+    num_traces = fit_traces = 0
+    sum_of_fitness = total_m = total_c = total_r = total_p = 0
+    for variant, count in variants.items():
+        result = cache.variants[cache.key(variant)]
+        num_traces += count
+        fit_traces += count if result['trace_is_fit'] else 0
+        sum_of_fitness += count * result['trace_fitness']
+        total_m += count * result['missing_tokens']
+        total_c += count * result['consumed_tokens']
+        total_r += count * result['remaining_tokens']
+        total_p += count * result['produced_tokens']
+
+    perc_fit_traces, average_fitness, log_fitness = 0.0, 0.0, 0
+    if num_traces > 0 and total_c > 0 and total_p > 0:
+        perc_fit_traces = float(100.0 * fit_traces) / float(num_traces)
+        average_fitness = float(sum_of_fitness) / float(num_traces)
+        log_fitness = 0.5 * (1 - total_m / total_c) + 0.5 * (1 - total_r / total_p)
+    return {'perc_fit_traces': perc_fit_traces, 'average_trace_fitness': average_fitness,
+            'log_fitness': log_fitness, 'percentage_of_fitting_traces': perc_fit_traces}
+
+# Function to collect the next activities and the number of traces of every (non-empty, proper) prefix of the variants
+def prefix_next_activities(variants):
+    next_activities, prefix_count = {}, Counter()
+    for variant, count in variants.items():
+        for i in range(1, len(variant)):
+            prefix = variant[:i]
+            next_activities.setdefault(prefix, set()).add(variant[i])
+            prefix_count[prefix] += count
+    return next_activities, prefix_count
+
+# Function to replay the prefixes that are not in the cache yet and store the labels enabled after them
+def replay_prefixes(prefixes, net, initial_marking, final_marking, cache):
+    missing = [prefix for prefix in prefixes if cache.key(prefix) not in cache.prefixes]
+    if missing:
+        parameters = {
+            token_replay.Parameters.CONSIDER_REMAINING_IN_FITNESS: False,
+            token_replay.Parameters.TRY_TO_REACH_FINAL_MARKING_THROUGH_HIDDEN: False,
+            token_replay.Parameters.STOP_IMMEDIATELY_UNFIT: True,
+            token_replay.Parameters.WALK_THROUGH_HIDDEN_TRANS: True,
+            token_replay.Parameters.CLEANING_TOKEN_FLOOD: False,
+            token_replay.Parameters.ACTIVITY_KEY: 'concept:name',
+        }
+        replayed = token_replay.apply(sequences_to_event_log(missing), net, initial_marking, final_marking,
+                                      parameters=parameters)
+        for prefix, result in zip(missing, replayed):
+            cache.prefixes[cache.key(prefix)] = {
+                'trace_is_fit': result['trace_is_fit'],
+                'enabled': sorted({transition.label for transition in result['enabled_transitions_in_marking']
+                                   if transition.label is not None}),
+            }
+
+# Function to compute the token-based replay precision (ETConformance) from the variants; every prefix is weighted
+# with the number of traces it occurs in, and the empty prefix with the number of events, as pm4py does for an event
+# log DataFrame (len(log) is its number of rows)
+def variant_precision_token_based_replay(variants, net, initial_marking, final_marking, cache):
+    # Next activities and number of traces of every prefix
+    next_activities, prefix_count = prefix_next_activities(variants)
+    replay_prefixes(next_activities, net, initial_marking, final_marking, cache)
+
+    # The empty prefix: transitions enabled in the initial marking against the start activities
+    num_events = sum(len(variant) * count for variant, count in variants.items())
+    start_activities = {variant[0] for variant in variants if variant}
+    enabled_initially = {transition.label for transition in
+                         get_visible_transitions_eventually_enabled_by_marking(net, initial_marking)}
+    sum_at = num_events * len(enabled_initially)
+    sum_ee = num_events * len(enabled_initially.difference(start_activities))
+
+    for prefix, count in prefix_count.items():
+        result = cache.prefixes[cache.key(prefix)]
+        if result['trace_is_fit']:
+            enabled = set(result['enabled'])
+            sum_at += len(enabled) * count
+            sum_ee += len(enabled.difference(next_activities[prefix])) * count
+
+    # Default value for precision, when no activated transitions are found
+    return 1 - float(sum_ee) / float(sum_at) if sum_at > 0 else 1.0
+
+# Function to compute the half-widths of the fitness and precision intervals from the sampled cases of the residual
+# stratum (sample size n out of num_residual cases), with the finite population correction. Precision is a ratio
+# (1 - escaping edges / activated transitions), so its variance is linearized around the estimated ratio
+def approximate_half_widths(sample, num_residual, totals, num_cases, confidence):
+    n = len(sample['fit'])
+    if n == num_residual:
+        return 0.0, 0.0
+    if n < 2:
+        return math.inf, math.inf
+    scale = num_residual * math.sqrt((1 - n / num_residual) / n)
+    quantile = student_t_quantile((1 + confidence) / 2, n - 1)
+
+    def sample_stdev(values):
+        mean = sum(values) / n
+        return math.sqrt(sum((value - mean) ** 2 for value in values) / (n - 1))
+
+    fitness_half_width = quantile * scale * sample_stdev(sample['fit']) / num_cases
+    if totals['at'] <= 0:
+        return fitness_half_width, 0.0
+    ratio = totals['ee'] / totals['at']
+    residuals = [ee - ratio * at for ee, at in zip(sample['ee'], sample['at'])]
+    return fitness_half_width, quantile * scale * sample_stdev(residuals) / totals['at']
+
+# Function to estimate the token-based replay fitness (fraction of fitting traces) and precision from a sample of the
+# cases. The cases are stratified by variant: variants with at least census_share of the cases are replayed exactly,
+# and the cases of the other variants are sampled without replacement, in batches, until both confidence intervals
+# are within the tolerance. Every sampled case is replayed through the variant cache, so repeated variants are free.
+# Precision counts the escaping edges against the next activities of the full log, as in the exact computation
+def approximate_token_based_replay(variants, net, initial_marking, final_marking, cache, approximation=None):
+    settings = {**default_approximation, **(approximation or {})}
+    num_cases = sum(variants.values())
+    census = {variant: count for variant, count in variants.items() if count >= settings['census_share'] * num_cases}
+    residual = [(variant, count) for variant, count in variants.items() if variant not in census]
+    num_residual = sum(count for _, count in residual)
+
+    # Next activities of every prefix in the full log, which needs no replay
+    next_activities, _ = prefix_next_activities(variants)
+    start_activities = {variant[0] for variant in variants if variant}
+    enabled_initially = {transition.label for transition in
+                         get_visible_transitions_eventually_enabled_by_marking(net, initial_marking)}
+
+    # Function to replay a set of variants and compute per variant whether it fits and its activated transitions
+    # and escaping edges over all its prefixes
+    values = {}
+    def replay(new_variants):
+        new_variants = [variant for variant in set(new_variants) if variant not in values]
+        replay_variants(new_variants, net, initial_marking, final_marking, cache)
+        replay_prefixes({variant[:i] for variant in new_variants for i in range(1, len(variant))}, net,
+                        initial_marking, final_marking, cache)
+        for variant in new_variants:
+            # The empty prefix counts once per event, as in the exact precision
+            at = len(variant) * len(enabled_initially)
+            ee = len(variant) * len(enabled_initially.difference(start_activities))
+            for i in range(1, len(variant)):
+                result = cache.prefixes[cache.key(variant[:i])]
+                if result['trace_is_fit']:
+                    enabled = set(result['enabled'])
+                    at += len(enabled)
+                    ee += len(enabled.difference(next_activities[variant[:i]]))
+            values[variant] = (1.0 if cache.variants[cache.key(variant)]['trace_is_fit'] else 0.0, at, ee)
+
+    # Census strata: every frequent variant is replayed once and weighted with its number of cases
+    replay(census)
+    totals = {'fit': 0.0, 'at': 0.0, 'ee': 0.0}
+    for variant, count in census.items():
+        fit, at, ee = values[variant]
+        totals['fit'] += count * fit
+        totals['at'] += count * at
+        totals['ee'] += count * ee
+
+    # Residual stratum: cases are numbered through the cumulative counts of its variants and sampled in batches
+    cumulative_counts, total = [], 0
+    for _, count in residual:
+        total += count
+        cumulative_counts.append(total)
+    rng = random.Random(settings['seed'])
+    drawn, sample = set(), {'fit': [], 'at': [], 'ee': []}
+    fitness_half_width = precision_half_width = 0.0
+    while len(drawn) < num_residual:
+        # Replay the whole residual stratum once the sample would cover half of it
+        if 2 * (len(drawn) + settings['batch_size']) >= num_residual:
+            batch = [case for case in range(num_residual) if case not in drawn]
+            drawn.update(batch)
+        else:
+            batch = []
+            while len(batch) < settings['batch_size']:
+                case = rng.randrange(num_residual)
+                if case not in drawn:
+                    drawn.add(case)
+                    batch.append(case)
+        batch_variants = [residual[bisect.bisect_right(cumulative_counts, case)][0] for case in batch]
+        replay(batch_variants)
+        for variant in batch_variants:
+            for key, value in zip(('fit', 'at', 'ee'), values[variant]):
+                sample[key].append(value)
+
+        # Estimates of the totals: census strata plus the residual stratum expanded from its sample mean
+        n = len(sample['fit'])
+        estimates = {key: totals[key] + num_residual * sum(sample[key]) / n for key in totals}
+        fitness_half_width, precision_half_width = approximate_half_widths(sample, num_residual, estimates,
+                                                                           num_cases, settings['confidence'])
+        if fitness_half_width <= settings['tolerance'] and precision_half_width <= settings['tolerance']:
+            totals = estimates
+            break
+
+    return {
+        'fitness_tbr': 100.0 * totals['fit'] / num_cases if num_cases else 0.0,
+        'precision_tbr': 1 - totals['ee'] / totals['at'] if totals['at'] > 0 else 1.0,
+        'fitness_tbr_half_width': 100.0 * fitness_half_width,
+        'precision_tbr_half_width': precision_half_width,
+        'confidence': settings['confidence'],
+        'sample_size': sum(census.values()) + len(drawn),
+        'num_cases': num_cases,
+    }
+
+# Function to align a chunk of variants with the model (run in a worker process); variants that cannot be aligned
+# give None
+def align_variants(variants, net, initial_marking, final_marking):
+    parameters = {
+        alignment_algorithm.Parameters.ACTIVITY_KEY: 'concept:name',
+        alignment_algorithm.Parameters.SHOW_PROGRESS_BAR: False,
+    }
+    aligned = alignment_algorithm.apply_log(sequences_to_event_log(variants), net, initial_marking, final_marking,
+                                            parameters=parameters)
+    return [None if result is None else {field: result[field] for field in ('fitness', 'cost', 'bwc')}
+            for result in aligned]
+
+# Function to align a chunk of prefixes with the model, stopping in any marking, and collect the labels enabled in
+# the markings the optimal alignments stop in (run in a worker process); prefixes that cannot be aligned give None
+def align_prefixes(prefixes, net, initial_marking, final_marking):
+    parameters = {
+        align_etconformance.Parameters.ACTIVITY_KEY: 'concept:name',
+        align_etconformance.Parameters.SHOW_PROGRESS_BAR: False,
+        align_etconformance.Parameters.MULTIPROCESSING: False,
+    }
+    stop_markings = align_etconformance.align_fake_log_stop_marking(sequences_to_event_log(prefixes), net,
+                                                                    initial_marking, final_marking, parameters)
+    enabled = []
+    for markings in align_etconformance.transform_markings_from_sync_to_original_net(stop_markings, net, parameters):
+        enabled.append(None if markings is None else sorted({
+            transition.label for marking in markings
+            for transition in get_visible_transitions_eventually_enabled_by_marking(net, marking)
+            if transition.label is not None}))
+    return enabled
+
+# Function to compute the missing results of a set of sequences with an alignment worker, in chunks spread over a
+# process pool, and store them in the cache
+def align_in_pool(worker, sequences, results, key, net, initial_marking, final_marking, num_workers, kind):
+    missing = [sequence for sequence in sequences if key(sequence) not in results]
+    chunk_size = max(1, min(alignment_chunk_size, -(-len(missing) // max(num_workers, 1))))
+    chunks = [tuple(missing[i:i + chunk_size]) for i in range(0, len(missing), chunk_size)]
+    for result in run_parallel(partial(worker, net=net, initial_marking=initial_marking, final_marking=final_marking),
+                               chunks, num_workers, description="Aligned",
+                               item_label=lambda chunk: f"{len(chunk)} {kind}"):
+        if result.error is not None:
+            raise RuntimeError(f"Aligning the {kind} failed:\n{result.error}")
+        for sequence, value in zip(result.item, result.value):
+            results[key(sequence)] = value
+
+# Function to compute fitness and precision with alignments, once per variant and prefix, with the alignments
+# computed in a process pool and cached per model. The results are weighted with the variant frequencies, which
+# gives the fitness of pm4py's alignment-based evaluation and its align-ETConformance precision
+def alignment_conformance(event_log, net, initial_marking, final_marking, alignment_cache_dir=None, num_workers=1):
+    variants = log_variants(event_log)
+    cache = ReplayCache(alignment_cache_dir, petri_net_hash(net, initial_marking, final_marking))
+    next_activities, prefix_count = prefix_next_activities(variants)
+    align_in_pool(align_variants, variants, cache.variants, cache.key, net, initial_marking, final_marking,
+                  num_workers, "variants")
+    align_in_pool(align_prefixes, next_activities, cache.prefixes, cache.key, net, initial_marking, final_marking,
+                  num_workers, "prefixes")
+    cache.save()
+
+    # Fitness over the traces that could be aligned, weighted with their number of traces
+    num_traces = fit_traces = 0
+    sum_cost = sum_bwc = 0.0
+    for variant, count in variants.items():
+        result = cache.variants[cache.key(variant)]
+        if result is None:
+            continue
+        num_traces += count
+        fit_traces += count if result['fitness'] == 1.0 else 0
+        sum_cost += count * result['cost']
+        sum_bwc += count * result['bwc']
+
+    # Precision: the empty prefix against the start activities, weighted with the number of events as in pm4py for an
+    # event log DataFrame, then every prefix that could be aligned
+    num_events = sum(len(variant) * count for variant, count in variants.items())
+    start_activities = {variant[0] for variant in variants if variant}
+    enabled_initially = {transition.label for transition in
+                         get_visible_transitions_eventually_enabled_by_marking(net, initial_marking)}
+    sum_at = num_events * len(enabled_initially)
+    sum_ee = num_events * len(enabled_initially.difference(start_activities))
+    for prefix, count in prefix_count.items():
+        enabled = cache.prefixes[cache.key(prefix)]
+        if enabled is not None:
+            sum_at += len(enabled) * count
+            sum_ee += len(set(enabled).difference(next_activities[prefix])) * count
+
+    return {
+        'fitness_alignments': 1 - sum_cost / sum_bwc if num_traces > 0 and sum_bwc > 0 else 0.0,
+        'fitting_traces_alignments': 100.0 * fit_traces / num_traces if num_traces > 0 else 0.0,
+        'precision_alignments': 1 - float(sum_ee) / float(sum_at) if sum_at > 0 else 1.0,
+    }
+
+# Function to compute the directly-follows graph, the start and end activities and the activity counts of an event
+# log DataFrame, with the events of every case in timestamp order
+def directly_follows_counts(event_df):
+    event_df = sort_case_events(event_df)
+    cases = event_df['case:concept:name']
+    activities = event_df['concept:name']
+    next_activities = activities.shift(-1)
+    same_case_as_next = cases.eq(cases.shift(-1))
+    first_of_case = ~cases.eq(cases.shift(1))
+
+    pairs = Counter(zip(activities[same_case_as_next].tolist(), next_activities[same_case_as_next].tolist()))
+    return {
+        'dfg': [[source, target, count] for (source, target), count in sorted(pairs.items())],
+        'start_activities': dict(Counter(activities[first_of_case].tolist())),
+        'end_activities': dict(Counter(activities[~same_case_as_next].tolist())),
+        'activities': dict(Counter(activities.tolist())),
+    }
+
+# Function to write the directly-follows counts of an event log to the cache
+def save_directly_follows_counts(counts, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(counts, f, sort_keys=True)
+
+# Function to add up the cached directly-follows counts of several event logs into a pm4py DFG and the activity counts
+def merge_directly_follows_counts(paths):
+    graph, start_activities, end_activities, activities = Counter(), Counter(), Counter(), Counter()
+    for path in paths:
+        with open(path, 'r') as f:
+            counts = json.load(f)
+        graph.update({(source, target): count for source, target, count in counts['dfg']})
+        start_activities.update(counts['start_activities'])
+        end_activities.update(counts['end_activities'])
+        activities.update(counts['activities'])
+    return DFG(graph, start_activities, end_activities), activities
+
+# Function to compute fitness and precision with token-based replay, over all traces ("log"), once per variant
+# ("variants") or estimated from a sample of the cases ("approximate", with the settings in approximation)
+def token_based_conformance(event_log, net, initial_marking, final_marking, replay_mode="variants",
+                            replay_cache_dir=None, approximation=None):
+    if replay_mode == "approximate":
+        cache = ReplayCache(replay_cache_dir, petri_net_hash(net, initial_marking, final_marking))
+        metrics = approximate_token_based_replay(log_variants(event_log), net, initial_marking, final_marking, cache,
+                                                 approximation)
+        cache.save()
+        return metrics
+    elif replay_mode == "variants":
+        variants = log_variants(event_log)
+        cache = ReplayCache(replay_cache_dir, petri_net_hash(net, initial_marking, final_marking))
+        fitness_tbr = variant_fitness_token_based_replay(variants, net, initial_marking, final_marking, cache)
+        precision_tbr = variant_precision_token_based_replay(variants, net, initial_marking, final_marking, cache)
+        cache.save()
+    elif replay_mode == "log":
+        # Compute fitness using token-based replay
+        fitness_tbr = pm4py.fitness_token_based_replay(
+            event_log, net, initial_marking, final_marking
+        )
+
+        # Compute precision using token-based replay
+        precision_tbr = pm4py.precision_token_based_replay(
+            event_log, net, initial_marking, final_marking
+        )
+    else:
+        raise ValueError(f"Unknown replay mode '{replay_mode}', expected 'variants', 'log' or 'approximate'.")
+
+    # Print the fitness_tbr dictionary to inspect its contents
+    print("Fitness TBR Dictionary:", fitness_tbr)
+
+    # Access the fitness value using the correct key
+    return {
+        'fitness_tbr': fitness_tbr['percentage_of_fitting_traces'],
+        'precision_tbr': precision_tbr,
+    }
+
+# Function to write the metrics to a text file
+def write_metrics(metrics, output_metrics_file):
+    with open(output_metrics_file, "w") as f:
+        f.write(format_conformance_metrics(metrics))
+
+# Function to discover the process model of an event log, save it and compute its conformance metrics. The Petri net
+# is only rendered here with render_mode "inline"; otherwise render_petri_nets.py renders it from the PNML file
+def extract_process_mining_indicators(event_log, log_name, output_dir, replay_mode="variants", render_mode="deferred",
+                                      results_db=None, approximation=None, compute_alignments=False,
+                                      alignment_num_workers=1):
+    # Discover the process model using the Inductive Miner
+    with measure("discovery", log_name) as measurement:
+        net, initial_marking, final_marking = pm4py.discover_petri_net_inductive(event_log)
+        measurement.count_events(event_log)
+
+    # Save the process model (Petri net) with its final marking to PNML file
+    output_model_file = os.path.join(output_dir, f"{log_name}.pnml")
+    pnml_exporter.apply(net, initial_marking, output_model_file, final_marking=final_marking)
+    output_files = [output_model_file]
+
+    # Visualize and save the Petri net as an image
+    if render_mode == "inline":
+        output_image_file = os.path.join(output_dir, f"{log_name}.png")
+        with measure("render", log_name):
+            gviz = pn_visualizer.apply(net, initial_marking, final_marking)
+            pn_visualizer.save(gviz, output_image_file)
+        output_files.append(output_image_file)
+
+    # Compute fitness and precision
+    output_files += check_conformance(event_log, log_name, output_dir, net, initial_marking, final_marking,
+                                      replay_mode, results_db, approximation, compute_alignments,
+                                      alignment_num_workers)
+
+    # Display success message
+    print(f"Process model and metrics saved for {log_name}")
+    return output_files
+
+# Function to compute the conformance metrics of an event log against a process model and write them to the output
+# directory and the results table; with compute_alignments the alignment-based metrics are added to the token-based
+# replay metrics
+def check_conformance(event_log, log_name, output_dir, net, initial_marking, final_marking, replay_mode="variants",
+                      results_db=None, approximation=None, compute_alignments=False, alignment_num_workers=1):
+    with measure("token_replay", log_name) as measurement:
+        metrics = token_based_conformance(event_log, net, initial_marking, final_marking, replay_mode,
+                                          os.path.join(output_dir, replay_cache_folder), approximation)
+        measurement.count_events(event_log)
+    if compute_alignments:
+        with measure("alignments", log_name) as measurement:
+            metrics.update(alignment_conformance(event_log, net, initial_marking, final_marking,
+                                                 os.path.join(output_dir, alignment_cache_folder),
+                                                 alignment_num_workers))
+            measurement.count_events(event_log)
+
+    # Write the metrics to a text file and the results table
+    output_metrics_file = os.path.join(output_dir, f"{log_name}_metrics.txt")
+    write_metrics(metrics, output_metrics_file)
+    if results_db is not None:
+        write_run_metrics(results_db, conformance_stage, log_name, metrics)
+    return [output_metrics_file]
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 16 2026
+
+Module: dataset_index.py
+Purpose: This module keeps the directories of the pipeline stages in one place and indexes the experiments and runs
+         of the dataset. A stage directory is scanned once with os.scandir, the Exp{n}Run{m} names are parsed and the
+         index is cached until the directory changes, so the stages iterate over the runs that exist instead of
+         checking every combination of a fixed experiment and run grid. Stages 04 to 06 index the experiments and
+         runs in the results table the same way.
+Inputs: The stage directories, or the (experiment, run) keys of the results table.
+Outputs: DatasetIndex objects with the experiments, their runs and the file of every run.
+"""
+
+import os
+
+from results_store import parse_experiment_run
+
+# Directories of the pipeline stages, relative to the working directory
+raw_input_dir = "01_raw_input"
+processed_input_dir = "02_processed_input"
+kpi_output_dir = "03_event_logs_KPIs"
+mining_output_dir = "04_process_discovery_conformance"
+summaries_dir = "05_summaries_per_experiment"
+
+# Last scan of every (directory, extension): the modification time of the directory and its index
+directory_scans = {}
+
+# Class with the runs of every experiment and, for a directory, the file of every run and the files without an
+# experiment and run in their name
+class DatasetIndex:
+    def __init__(self, run_paths, other_paths=()):
+        self.run_paths = dict(run_paths)
+        self.other_paths = list(other_paths)
+        self._runs = {}
+        for exp, run in self.run_paths:
+            self._runs.setdefault(exp, []).append(run)
+        for runs in self._runs.values():
+            runs.sort()
+
+    def __contains__(self, key):
+        return key in self.run_paths
+
+    def __len__(self):
+        return len(self.run_paths)
+
+    # Function to get the experiments, in numerical order
+    def experiments(self):
+        return sorted(self._runs)
+
+    # Function to get the runs of an experiment, in numerical order
+    def runs(self, exp):
+        return self._runs.get(exp, [])
+
+    # Function to get the path of a run, or None if it is not in the index
+    def path(self, exp, run):
+        return self.run_paths.get((exp, run))
+
+    # Function to get the paths of all indexed files, sorted by file name as the stages process them
+    def file_paths(self):
+        paths = [path for path in self.run_paths.values() if path is not None] + self.other_paths
+        return sorted(paths, key=os.path.basename)
+
+# Function to index the (experiment, run) keys of the results table
+def results_index(run_metrics):
+    return DatasetIndex({key: None for key in run_metrics if key[0] is not None})
+
+# Function to scan a directory for the files with the given extension
+def scan_directory(directory, extension):
+    run_paths, other_paths = {}, []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.endswith(extension) or not entry.is_file():
+                continue
+            exp, run = parse_experiment_run(entry.name)
+            # Files without an experiment and run, or a second file of the same run, are kept as other files
+            if exp is None or (exp, run) in run_paths:
+                other_paths.append(entry.path)
+            else:
+                run_paths[(exp, run)] = entry.path
+    return DatasetIndex(run_paths, other_paths)
+
+# Function to get the index of a stage directory. Only the last scan of every directory and extension is kept, and
+# the directory is scanned again when files were added, removed or renamed since, which changes its modification
+# time
+def directory_index(directory, extension=""):
+    if not os.path.isdir(directory):
+        return DatasetIndex({})
+    modified_ns = os.stat(directory).st_mtime_ns
+    scan = directory_scans.get((directory, extension))
+    if scan is None or scan[0] != modified_ns:
+        scan = (modified_ns, scan_directory(directory, extension))
+        directory_scans[(directory, extension)] = scan
+    return scan[1]
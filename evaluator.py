@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 16 2026
+
+Module: evaluator.py
+Purpose: This module evaluates simulation configurations for an optimization loop without the path-bound pipeline
+         scripts. A batch of parameter configurations, each with one or more raw runs (raw files or raw DataFrames),
+         is evaluated in parallel: the runs are converted into event logs, and the average product cycle time,
+         the average vehicle utilization rate and the token-based replay fitness and precision (of a model discovered
+         per run) are averaged over the runs of each configuration. The results are memoized on disk by a hash of
+         the configuration, the evaluation settings and the content of the runs, so revisiting a configuration
+         costs nothing. Importing the module has no side effects.
+Inputs: A list of (configuration, runs) pairs; a configuration is a JSON-serializable dictionary and the runs are a
+        raw file path, a raw DataFrame or a list of those.
+Outputs: A result dictionary per configuration, in the order of the batch, and a JSON file per evaluated
+         configuration in the cache directory.
+"""
+
+import hashlib
+import json
+import os
+from functools import partial
+
+import pandas as pd
+import pm4py
+
+from build_cache import file_hash
+from conformance import mining_columns, replay_cache_folder, token_based_conformance
+from kpi_engine import (compute_event_log_indicators, default_end_activity, default_start_activity,
+                        default_utilization_mode, default_vehicle_activity_pattern)
+from parallel_runner import default_num_workers, run_parallel
+from raw_event_log import create_event_log_dataframe, load_data
+
+# Directory with the memoized results, one JSON file per configuration and data
+default_cache_dir = ".evaluator_cache"
+
+# Metrics that are returned per configuration (averaged over its runs)
+evaluation_metrics = ['average_cycle_time', 'average_utilization_rate', 'fitness_tbr', 'precision_tbr']
+
+# Settings of the KPIs and the conformance checking, as in stages 02 and 03
+default_settings = {
+    'start_activity': default_start_activity,
+    'end_activity': default_end_activity,
+    'vehicle_activity_pattern': default_vehicle_activity_pattern,
+    'utilization_mode': default_utilization_mode,
+    'replay_mode': "variants",
+}
+
+# Function to get the runs of a configuration as a list
+def run_list(runs):
+    return list(runs) if isinstance(runs, (list, tuple)) else [runs]
+
+# Function to compute the content hash of a raw run (file path or DataFrame)
+def run_hash(run):
+    if isinstance(run, pd.DataFrame):
+        digest = hashlib.sha256(json.dumps([str(col) for col in run.columns]).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(run, index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+    return file_hash(run)
+
+# Function to compute the memoization key of a configuration with its runs and the evaluation settings
+def evaluation_key(config, runs, settings):
+    content = {'config': config, 'settings': settings, 'runs': [run_hash(run) for run in run_list(runs)]}
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+# Function to compute the metrics of a single raw run
+def evaluate_run(run, settings, replay_cache_dir=None):
+    raw_df = run if isinstance(run, pd.DataFrame) else load_data(run)
+    event_df = create_event_log_dataframe(raw_df)
+    indicators = compute_event_log_indicators(event_df, settings['start_activity'], settings['end_activity'],
+                                              settings['vehicle_activity_pattern'], settings['utilization_mode'])
+    event_log = event_df[mining_columns]
+    net, initial_marking, final_marking = pm4py.discover_petri_net_inductive(event_log)
+    conformance = token_based_conformance(event_log, net, initial_marking, final_marking, settings['replay_mode'],
+                                          replay_cache_dir)
+    metrics = {**indicators, **conformance}
+    return {metric: float(metrics[metric]) for metric in evaluation_metrics}
+
+# Function to evaluate a configuration: the metrics averaged over its runs, and the metrics per run
+def evaluate_configuration(item, settings, replay_cache_dir=None):
+    config, runs = item
+    run_metrics = [evaluate_run(run, settings, replay_cache_dir) for run in run_list(runs)]
+    result = {metric: sum(metrics[metric] for metrics in run_metrics) / len(run_metrics)
+              for metric in evaluation_metrics}
+    result.update(config=config, num_runs=len(run_metrics), runs=run_metrics)
+    return result
+
+# Function to read a memoized result, or None if the configuration was not evaluated before
+def read_cached_result(cache_dir, key):
+    path = os.path.join(cache_dir, f"{key}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+# Function to memoize a result; the replace makes sure an interrupted write never leaves a corrupt file
+def write_cached_result(cache_dir, key, result):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{key}.json")
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, 'w') as f:
+        json.dump(result, f, default=str)
+    os.replace(temporary_path, path)
+
+# Function to evaluate a batch of (configuration, runs) pairs, in parallel for the configurations that are not
+# memoized yet. Every result has the metrics averaged over the runs, the configuration, the number of runs, the
+# metrics per run and whether it came from the cache; a configuration that fails gets its traceback under 'error'
+# and is not memoized
+def evaluate_batch(batch, cache_dir=default_cache_dir, num_workers=default_num_workers, settings=None):
+    settings = {**default_settings, **(settings or {})}
+    batch = [(config, runs) for config, runs in batch]
+    keys = [evaluation_key(config, runs, settings) for config, runs in batch]
+
+    results, pending = {}, {}
+    for key, item in zip(keys, batch):
+        cached = read_cached_result(cache_dir, key) if cache_dir else None
+        if cached is not None:
+            results[key] = {**cached, 'cached': True}
+        else:
+            # Identical configurations with identical runs in one batch are evaluated once
+            pending.setdefault(key, item)
+
+    replay_cache_dir = os.path.join(cache_dir, replay_cache_folder) if cache_dir else None
+    pending_keys = list(pending)
+    worker = partial(evaluate_configuration, settings=settings, replay_cache_dir=replay_cache_dir)
+    for key, result in zip(pending_keys, run_parallel(worker, [pending[key] for key in pending_keys], num_workers,
+                                                      description="Evaluated",
+                                                      item_label=lambda item: json.dumps(item[0], default=str))):
+        if result.error is not None:
+            results[key] = {'config': result.item[0], 'error': result.error, 'cached': False}
+            continue
+        if cache_dir:
+            write_cached_result(cache_dir, key, result.value)
+        results[key] = {**result.value, 'cached': False}
+    return [results[key] for key in keys]
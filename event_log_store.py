@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 16 2026
+
+Module: event_log_store.py
+Purpose: This module provides a columnar event log store that is used as the interchange format between the stages.
+         Event logs are stored as Parquet files with dictionary-encoded (categorical) activity and resource columns,
+         so the later stages can read only the columns they need instead of parsing the full XES file.
+         In memory, event logs are kept compact: the case identifiers and the repeating string columns are
+         dictionary-encoded (categoricals with integer codes) and the timestamps are int64-backed datetime64
+         columns, so no Python object is stored per event. XES files (also gzip-compressed) are read incrementally
+         with xes_stream.py when only some columns are needed.
+Inputs: pm4py-compatible event log DataFrames (see create_event_log_dataframe in raw_event_log.py), or XES and
+        Parquet files written by 01_convert_to_xes.py.
+Outputs: Parquet files, and event log DataFrames restricted to the requested columns.
+Requires: pyarrow (or fastparquet) for reading and writing Parquet files.
+"""
+
+import os
+
+import pandas as pd
+import pm4py
+
+from xes_stream import read_xes_dataframe
+
+# File extensions of the supported event log formats
+xes_extension = ".xes"
+compressed_xes_extension = ".xes.gz"
+parquet_extension = ".parquet"
+
+# Columns that repeat a small set of values and are therefore stored as categoricals
+categorical_columns = ['concept:name', 'lifecycle:transition', 'org:resource', 'vehicleType',
+                       'productType', 'processingStation']
+
+# Column with the case identifiers, which are integer-encoded in compact event logs
+case_column = 'case:concept:name'
+
+# Function to convert an event log DataFrame to the compact in-memory representation
+def compact_event_log(event_df):
+    columns = [col for col in categorical_columns + [case_column] if col in event_df.columns]
+    encoded = {col: 'category' for col in columns if not isinstance(event_df[col].dtype, pd.CategoricalDtype)}
+    if encoded:
+        event_df = event_df.astype(encoded)
+    if 'time:timestamp' in event_df.columns and not pd.api.types.is_datetime64_any_dtype(event_df['time:timestamp']):
+        event_df = event_df.assign(**{'time:timestamp': pd.to_datetime(event_df['time:timestamp'])})
+    return event_df
+
+# Function to decode the categoricals of a compact event log to the plain string columns pm4py expects
+def decode_event_log(event_df):
+    decoded = {col: object for col in event_df.columns if isinstance(event_df[col].dtype, pd.CategoricalDtype)}
+    if decoded:
+        event_df = event_df.astype(decoded)
+    return event_df
+
+# Function to get the name of an event log from its file path, without the (compressed) extension
+def event_log_name(file_path):
+    file_name = os.path.basename(file_path)
+    if file_name.endswith(compressed_xes_extension):
+        return file_name[:-len(compressed_xes_extension)]
+    return os.path.splitext(file_name)[0]
+
+# Function to write an event log DataFrame to a Parquet file
+def write_event_log_parquet(event_df, output_path):
+    event_df = event_df.astype({col: 'category' for col in categorical_columns if col in event_df.columns})
+    event_df.to_parquet(output_path, index=False)
+
+# Function to read an event log from an XES or Parquet file as a DataFrame
+def read_event_log(file_path, columns=None, categorical=True):
+    if file_path.endswith(parquet_extension):
+        # Parquet only reads the requested columns from disk
+        event_df = pd.read_parquet(file_path, columns=columns)
+    elif columns is not None:
+        # Parse the XES file trace by trace, keeping only the requested attributes
+        event_df = read_xes_dataframe(file_path, columns)
+    else:
+        event_df = pm4py.convert_to_dataframe(pm4py.read_xes(file_path))
+
+    # Return the compact representation, or plain string columns for pm4py
+    return compact_event_log(event_df) if categorical else decode_event_log(event_df)
+
+# Class to append event log DataFrames to a single Parquet file, one row group per call
+class ParquetEventLogWriter:
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.writer = None
+        self.schema = None
+
+    def write(self, event_df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        event_df = event_df.astype({col: 'category' for col in categorical_columns if col in event_df.columns})
+        if self.writer is None:
+            # Fix the schema on the first chunk; wide dictionary indices and string types for columns that
+            # happen to be empty keep it valid for all later chunks
+            schema = pa.Table.from_pandas(event_df, preserve_index=False).schema
+            for i, field in enumerate(schema):
+                if pa.types.is_dictionary(field.type):
+                    schema = schema.set(i, field.with_type(pa.dictionary(pa.int32(), field.type.value_type)))
+                elif pa.types.is_null(field.type):
+                    schema = schema.set(i, field.with_type(pa.string()))
+            self.schema = schema
+            self.writer = pq.ParquetWriter(self.output_path, self.schema)
+        self.writer.write_table(pa.Table.from_pandas(event_df, schema=self.schema, preserve_index=False))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
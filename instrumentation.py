@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 16 2026
+
+Module: instrumentation.py
+Purpose: This module provides opt-in instrumentation of the pipeline stages. The hot sections of every stage (reading
+         event logs, conversion, KPI computation, process discovery, token replay and rendering) are wrapped in
+         measure(), which records the wall time, CPU time, peak resident memory and the number of events and cases
+         per file and phase. Instrumentation is enabled by setting the environment variable PMSO_INSTRUMENTATION_LOG
+         to the path of a JSON-lines log; the records of all stages, worker processes and runs are appended to it.
+         Running this module on its own aggregates the log per script and phase.
+Inputs: The environment variable PMSO_INSTRUMENTATION_LOG.
+Outputs: A JSON-lines log with one record per file and phase, and an aggregated table printed to the console.
+"""
+
+import contextlib
+import datetime
+import json
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; the peak memory is then not recorded
+    resource = None
+
+# Environment variable with the path of the instrumentation log
+instrumentation_log_variable = "PMSO_INSTRUMENTATION_LOG"
+
+# Log that is aggregated when running this module on its own and the variable is not set
+default_instrumentation_log = "pmso_instrumentation.jsonl"
+
+# Function to get the path of the instrumentation log, or None when instrumentation is disabled
+def instrumentation_log():
+    return os.environ.get(instrumentation_log_variable) or None
+
+# Function to get the peak resident set size of the current process in MB, or None if it is not available
+def peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+# Class with the event and case counts of a measured phase; counting is skipped when instrumentation is disabled
+class Measurement:
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.counts = {}
+
+    # Function to record the number of events and cases of an event log DataFrame
+    def count_events(self, event_df, case_column='case:concept:name'):
+        if not self.enabled:
+            return
+        self.counts['events'] = len(event_df)
+        if case_column in event_df.columns:
+            self.counts['cases'] = int(event_df[case_column].nunique())
+
+# Function to measure a phase of a stage for a file, as a context manager. The peak memory is the high-water mark
+# of the process at the end of the phase, so it includes earlier phases and files handled by the same process
+@contextlib.contextmanager
+def measure(phase, file_name=None):
+    log_path = instrumentation_log()
+    measurement = Measurement(log_path is not None)
+    if log_path is None:
+        yield measurement
+        return
+
+    started = datetime.datetime.now().isoformat(timespec='milliseconds')
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    failed = False
+    try:
+        yield measurement
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        wall_seconds = time.perf_counter() - wall_start
+        record = {
+            'started': started,
+            'script': os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else None,
+            'pid': os.getpid(),
+            'phase': phase,
+            'file': file_name,
+            'wall_seconds': wall_seconds,
+            'cpu_seconds': time.process_time() - cpu_start,
+            'peak_rss_mb': peak_rss_mb(),
+            'events': measurement.counts.get('events'),
+            'cases': measurement.counts.get('cases'),
+            'error': failed,
+        }
+        if record['events'] is not None and wall_seconds > 0:
+            record['events_per_second'] = record['events'] / wall_seconds
+        # A single append per record keeps the lines of concurrent worker processes intact
+        with open(log_path, 'a') as f:
+            f.write(json.dumps(record) + "\n")
+
+# Function to aggregate the records of an instrumentation log per script and phase
+def summarize_log(log_path):
+    totals = {}
+    with open(log_path, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            total = totals.setdefault((record['script'] or "", record['phase']), {
+                'records': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'peak_rss_mb': None, 'events': 0,
+            })
+            total['records'] += 1
+            total['wall_seconds'] += record['wall_seconds']
+            total['cpu_seconds'] += record['cpu_seconds']
+            total['events'] += record['events'] or 0
+            if record['peak_rss_mb'] is not None:
+                total['peak_rss_mb'] = max(total['peak_rss_mb'] or 0.0, record['peak_rss_mb'])
+    return totals
+
+# Start the aggregation when running the module
+if __name__ == "__main__":
+    log_path = instrumentation_log() or default_instrumentation_log
+    print(f"{'Script':<42} {'Phase':<26} {'Files':>6} {'Wall (s)':>10} {'CPU (s)':>10} {'Events/sec':>12} "
+          f"{'Peak MB':>9}")
+    for (script, phase), total in sorted(summarize_log(log_path).items()):
+        events_per_second = (f"{total['events'] / total['wall_seconds']:.0f}"
+                             if total['events'] and total['wall_seconds'] > 0 else "N/A")
+        peak_memory = "N/A" if total['peak_rss_mb'] is None else f"{total['peak_rss_mb']:.0f}"
+        print(f"{script:<42} {phase:<26} {total['records']:>6} {total['wall_seconds']:>10.3f} "
+              f"{total['cpu_seconds']:>10.3f} {events_per_second:>12} {peak_memory:>9}")
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 16 2026
+
+Module: kpi_engine.py
+Purpose: This module computes the event log KPIs of stage 02 (product cycle time and vehicle utilization) with
+         single groupby aggregations over the whole event log, instead of filtering the log once per case or vehicle.
+         Vehicle utilization is either the time between the first and the last vehicle event ("span") or the busy
+         time ("busy"): the intervals from assignment to drop-off of every product, merged per vehicle in one sorted
+         pass, together with the idle time and the concurrency profile of every vehicle.
+Inputs: An event log DataFrame with the columns 'case:concept:name', 'concept:name', 'time:timestamp' and
+        'org:resource'.
+Outputs: A dictionary with the average cycle time, the average utilization rate and the utilization per vehicle,
+         and the KPI text file written by 02_extract_event_log_indicators.py.
+"""
+
+import os
+
+import pandas as pd
+
+from results_store import event_log_kpis_stage, format_cycle_time, write_run_metrics
+
+# Columns needed for the KPIs
+kpi_columns = ['case:concept:name', 'concept:name', 'time:timestamp', 'org:resource']
+
+# Activities that mark the start and the end of a product's cycle
+default_start_activity = 'productCallsForTransportRegion1'
+default_end_activity = 'droppedOffRegion3'
+
+# Activities in which a vehicle is involved (case-insensitive regular expression)
+default_vehicle_activity_pattern = r'assignedToVehicle|pickedUp|droppedOff'
+
+# Vehicle activities that end a busy interval (case-insensitive regular expression)
+default_interval_end_pattern = r'droppedOff'
+
+# Vehicle utilization: time between the first and the last vehicle event ("span") or merged busy intervals ("busy")
+default_utilization_mode = "span"
+
+# Error raised when the KPIs cannot be computed for an event log
+class IndicatorError(ValueError):
+    pass
+
+# Function to compute the cycle time in seconds of every case that has both a start and an end event
+def case_cycle_times(event_df, start_activity=default_start_activity, end_activity=default_end_activity):
+    activities = event_df['concept:name']
+    start_times = event_df.loc[activities == start_activity].groupby(
+        'case:concept:name', observed=True)['time:timestamp'].min()
+    end_times = event_df.loc[activities == end_activity].groupby(
+        'case:concept:name', observed=True)['time:timestamp'].max()
+    # Cases without a start or an end event get NaT and are dropped
+    durations = (end_times - start_times).dropna().sort_index()
+    return durations.dt.total_seconds()
+
+# Function to compute the time between the first and the last vehicle event of every vehicle, in order of appearance
+def vehicle_utilization_times(vehicle_df):
+    spans = vehicle_df.groupby('org:resource', sort=False, dropna=False, observed=True)['time:timestamp'].agg(
+        ['min', 'max'])
+    return (spans['max'] - spans['min']).dt.total_seconds()
+
+# Function to pair the vehicle events of every product into busy intervals: an interval runs from the first vehicle
+# event after the previous drop-off (normally the assignment) up to and including the next drop-off
+def vehicle_busy_intervals(vehicle_df, interval_end_pattern=default_interval_end_pattern):
+    vehicle_df = vehicle_df.sort_values(['org:resource', 'case:concept:name', 'time:timestamp'], kind='mergesort')
+    is_end = vehicle_df['concept:name'].astype(str).str.contains(interval_end_pattern, case=False, na=False)
+    keys = [vehicle_df['org:resource'], vehicle_df['case:concept:name']]
+    # Number of drop-offs before every event of the same product and vehicle
+    interval_nr = is_end.astype(int).groupby(keys, observed=True).cumsum() - is_end.astype(int)
+    intervals = vehicle_df['time:timestamp'].groupby(keys + [interval_nr], observed=True).agg(['min', 'max'])
+    has_end = is_end.groupby(keys + [interval_nr], observed=True).any()
+    intervals = intervals[has_end]
+    return pd.DataFrame({
+        'org:resource': intervals.index.get_level_values(0),
+        'start': intervals['min'].to_numpy(),
+        'end': intervals['max'].to_numpy(),
+    })
+
+# Function to merge the overlapping busy intervals of every vehicle and compute its busy time, with a single pass
+# over the intervals sorted by vehicle and start time
+def vehicle_busy_times(intervals):
+    if intervals.empty:
+        return pd.Series(dtype=float)
+    intervals = intervals.sort_values(['org:resource', 'start'], kind='mergesort').reset_index(drop=True)
+    vehicles = intervals['org:resource']
+    # An interval starts a new merged block when it starts after every earlier interval of the vehicle has ended
+    previous_end = intervals.groupby(vehicles, sort=False, observed=True)['end'].cummax().groupby(
+        vehicles, sort=False, observed=True).shift()
+    block_nr = (previous_end.isna() | (intervals['start'] > previous_end)).cumsum()
+    blocks = intervals.groupby(block_nr).agg(vehicle=('org:resource', 'first'), start=('start', 'min'),
+                                             end=('end', 'max'))
+    busy_times = (blocks['end'] - blocks['start']).dt.total_seconds()
+    return busy_times.groupby(blocks['vehicle'].to_numpy(), sort=False).sum()
+
+# Function to compute the concurrency profile of every vehicle: the time in seconds during which it has a given number
+# of open busy intervals, with a sweep over the sorted interval starts (+1) and ends (-1)
+def vehicle_concurrency_profiles(intervals):
+    if intervals.empty:
+        return pd.Series(dtype=float)
+    changes = pd.DataFrame({
+        'org:resource': pd.concat([intervals['org:resource'], intervals['org:resource']], ignore_index=True),
+        'time': pd.concat([intervals['start'], intervals['end']], ignore_index=True),
+        'delta': [1] * len(intervals) + [-1] * len(intervals),
+    })
+    # Ends sort before starts at the same time, so touching intervals do not overlap
+    changes = changes.sort_values(['org:resource', 'time', 'delta'], kind='mergesort').reset_index(drop=True)
+    vehicles = changes['org:resource']
+    level = changes['delta'].groupby(vehicles, sort=False, observed=True).cumsum()
+    duration = (changes.groupby(vehicles, sort=False, observed=True)['time'].shift(-1)
+                - changes['time']).dt.total_seconds()
+    profile = duration[level > 0].groupby([vehicles[level > 0].to_numpy(), level[level > 0].to_numpy()]).sum()
+    return profile[profile > 0]
+
+# Function to compute all KPIs of an event log
+def compute_event_log_indicators(event_df, start_activity=default_start_activity, end_activity=default_end_activity,
+                                 vehicle_activity_pattern=default_vehicle_activity_pattern,
+                                 utilization_mode=default_utilization_mode):
+    # Ensure 'case:concept:name' column is present
+    if 'case:concept:name' not in event_df.columns:
+        raise IndicatorError("'case:concept:name' column not found")
+
+    # Compute average cycle time
+    durations = case_cycle_times(event_df, start_activity, end_activity)
+    avg_cycle_time = sum(durations.tolist()) / len(durations) if len(durations) else 0
+
+    # Filter events that involve vehicle activities
+    vehicle_df = event_df[
+        event_df['concept:name'].str.contains(vehicle_activity_pattern, case=False, na=False)
+    ]
+    if vehicle_df.empty:
+        raise IndicatorError("No vehicle events found")
+    if 'org:resource' not in vehicle_df.columns or 'time:timestamp' not in vehicle_df.columns:
+        raise IndicatorError("Necessary columns not found")
+
+    # Utilization time per vehicle
+    vehicle_utilization_df = vehicle_utilization_times(vehicle_df).to_frame('UtilizationTime')
+
+    # Calculate total time span in the event log
+    total_time_span = (event_df['time:timestamp'].max() - event_df['time:timestamp'].min()).total_seconds()
+    if total_time_span == 0:
+        raise IndicatorError("Total time span is zero")
+
+    # With busy intervals, the utilization time is the busy time; the span is kept for comparison
+    concurrency_profiles = None
+    if utilization_mode == "busy":
+        intervals = vehicle_busy_intervals(vehicle_df)
+        concurrency_profiles = vehicle_concurrency_profiles(intervals)
+        vehicle_utilization_df['SpanTime'] = vehicle_utilization_df['UtilizationTime']
+        vehicle_utilization_df['SpanRate'] = vehicle_utilization_df['SpanTime'] / total_time_span
+        busy_times = vehicle_busy_times(intervals)
+        vehicle_utilization_df['UtilizationTime'] = busy_times.reindex(
+            list(vehicle_utilization_df.index)).fillna(0.0).to_numpy()
+        vehicle_utilization_df['IdleTime'] = total_time_span - vehicle_utilization_df['UtilizationTime']
+    elif utilization_mode != "span":
+        raise ValueError(f"Unknown utilization mode '{utilization_mode}', expected 'span' or 'busy'.")
+
+    # Calculate the utilization rate for each vehicle (utilization time / total event log time span)
+    vehicle_utilization_df['UtilizationRate'] = vehicle_utilization_df['UtilizationTime'] / total_time_span
+
+    return {
+        'average_cycle_time': avg_cycle_time,
+        'average_utilization_rate': vehicle_utilization_df['UtilizationRate'].mean(),
+        'total_time_span': total_time_span,
+        'vehicle_utilization': vehicle_utilization_df,
+        'concurrency_profiles': concurrency_profiles,
+    }
+
+# Function to write the KPIs to a text file
+def write_indicators(indicators, output_file_name):
+    with open(output_file_name, 'w') as f:
+        f.write(format_cycle_time(indicators['average_cycle_time']) + "\n")
+        f.write(f"Average Resource Utilization Rate (Vehicles): {indicators['average_utilization_rate']:.4f}\n\n")
+        f.write("Utilization Time and Rate for each vehicle:\n")
+        for vehicle, row in indicators['vehicle_utilization'].iterrows():
+            f.write(
+                f"Vehicle {vehicle}: Utilization Time: {row['UtilizationTime']:.2f} seconds, "
+                f"Utilization Rate: {row['UtilizationRate']:.4f}\n"
+            )
+
+        # Busy interval details, with the span-based utilization for comparison
+        if 'IdleTime' in indicators['vehicle_utilization'].columns:
+            f.write("\nBusy Time, Idle Time and Span Utilization for each vehicle:\n")
+            for vehicle, row in indicators['vehicle_utilization'].iterrows():
+                f.write(
+                    f"Vehicle {vehicle}: Busy Time: {row['UtilizationTime']:.2f} seconds, "
+                    f"Idle Time: {row['IdleTime']:.2f} seconds, Span Time: {row['SpanTime']:.2f} seconds, "
+                    f"Span Utilization Rate: {row['SpanRate']:.4f}\n"
+                )
+        if indicators.get('concurrency_profiles') is not None:
+            f.write("\nConcurrency profile for each vehicle (seconds with n open busy intervals):\n")
+            profiles = indicators['concurrency_profiles']
+            for vehicle in indicators['vehicle_utilization'].index:
+                if vehicle not in profiles.index.get_level_values(0):
+                    continue
+                levels = ", ".join(f"{level}: {seconds:.2f}" for level, seconds in profiles.loc[vehicle].items())
+                f.write(f"Vehicle {vehicle}: {levels}\n")
+
+# Function to compute the KPIs of an event log and write them to the output directory
+def extract_event_log_indicators(event_df, log_name, output_dir, start_activity=default_start_activity,
+                                 end_activity=default_end_activity,
+                                 vehicle_activity_pattern=default_vehicle_activity_pattern, results_db=None,
+                                 utilization_mode=default_utilization_mode):
+    # Compute the cycle time and utilization KPIs
+    try:
+        indicators = compute_event_log_indicators(event_df, start_activity, end_activity, vehicle_activity_pattern,
+                                                  utilization_mode)
+    except IndicatorError as error:
+        print(f"{error} in {log_name}, skipping.")
+        if results_db is not None:
+            write_run_metrics(results_db, event_log_kpis_stage, log_name, {})
+        return []
+
+    # Prepare the output file name
+    output_file_name = os.path.join(output_dir, f"{log_name}.txt")
+
+    # Write the results to a text file and the results table
+    write_indicators(indicators, output_file_name)
+    if results_db is not None:
+        metrics = {'average_cycle_time': indicators['average_cycle_time'],
+                   'average_utilization_rate': indicators['average_utilization_rate']}
+        if 'SpanRate' in indicators['vehicle_utilization'].columns:
+            metrics['average_span_utilization_rate'] = indicators['vehicle_utilization']['SpanRate'].mean()
+        write_run_metrics(results_db, event_log_kpis_stage, log_name, metrics, indicators['vehicle_utilization'])
+
+    # Display success message
+    print(f"Processed {log_name}, results saved to {output_file_name}")
+    return [output_file_name]
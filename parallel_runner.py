@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 16 2026
+
+Module: parallel_runner.py
+Purpose: This module fans the per-file work of the pipeline stages out over a pool of worker processes. A failure in
+         one file is caught in the worker and reported, without stopping the other files. Results are returned in
+         the order of the input items, independent of the order in which the workers finish.
+Inputs: A worker function that takes a single item (e.g., a file path) and a list of items.
+Outputs: A list of TaskResult tuples (item, value, error) in input order, and progress messages on the console.
+"""
+
+import os
+import traceback
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Outcome of a single item: the return value of the worker, or the formatted traceback if it failed
+TaskResult = namedtuple("TaskResult", ["item", "value", "error"])
+
+# Default number of worker processes
+default_num_workers = os.cpu_count() or 1
+
+# Function to run the worker on one item and capture any exception
+def run_isolated(worker, item):
+    try:
+        return TaskResult(item, worker(item), None)
+    except Exception:
+        return TaskResult(item, None, traceback.format_exc())
+
+# Function to report the progress of a finished item
+def report_progress(result, done, total, description, item_label=str):
+    status = "done" if result.error is None else "FAILED"
+    print(f"[{done}/{total}] {description} {item_label(result.item)}: {status}")
+    if result.error is not None:
+        print(result.error)
+
+# Function to run the worker for all items, in a process pool if more than one worker is requested; item_label
+# formats an item for the progress messages
+def run_parallel(worker, items, num_workers=default_num_workers, description="Processed", item_label=str):
+    items = list(items)
+    results = [None] * len(items)
+
+    if num_workers <= 1 or len(items) <= 1:
+        # Run in this process, which keeps debugging and profiling simple
+        for index, item in enumerate(items):
+            results[index] = run_isolated(worker, item)
+            report_progress(results[index], index + 1, len(items), description, item_label)
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures = {executor.submit(run_isolated, worker, item): index for index, item in enumerate(items)}
+            for done, future in enumerate(as_completed(futures), 1):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception:
+                    # The worker process itself died (e.g., out of memory) or the item could not be pickled
+                    results[index] = TaskResult(items[index], None, traceback.format_exc())
+                report_progress(results[index], done, len(items), description, item_label)
+
+    failed = [result.item for result in results if result.error is not None]
+    if failed:
+        print(f"{len(failed)} of {len(items)} items failed: {', '.join(map(item_label, failed))}")
+    return results
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 16 2026
+
+Module: raw_event_log.py
+Purpose: This module reads the raw simulation output and converts it into a pm4py-compatible event log DataFrame
+         (one row per event, with the XES attribute names as columns). It is shared by 01_convert_to_xes.py and
+         evaluator.py, and can be imported without running any pipeline stage.
+Inputs: Tab-separated raw simulation output, or a pandas DataFrame with the same columns.
+Outputs: Event log DataFrames with the events of every case in their original order.
+"""
+
+import pandas as pd
+
+# Columns that have to be present in the raw simulation output
+required_columns = ['uniqueID', 'productNr', 'event', 'timeStamp', 'productType',
+                    'vehicleType', 'vehicle', 'currentDecayLevel', 'processingStation',
+                    'productIDStr', 'productID']
+
+# Explicit column types of the raw simulation output, so a file is parsed the same way whether it is read at once or
+# in chunks; the nullable integer types keep the rows without a productNr or uniqueID readable until they are dropped
+raw_dtypes = {'uniqueID': 'Int64', 'productNr': 'Int64', 'event': str, 'timeStamp': str, 'productType': str,
+              'vehicleType': str, 'vehicle': str, 'currentDecayLevel': 'float64', 'processingStation': str,
+              'productIDStr': str, 'productID': 'Int64'}
+
+# Function to convert the raw DataFrame into a pm4py-compatible event log DataFrame
+def create_event_log_dataframe(df):
+    # Check if necessary columns exist
+    for col in required_columns:
+        if col not in df.columns:
+            raise KeyError(f"The column '{col}' is not present in the DataFrame.")
+
+    # Handle missing or NaN values in 'productNr' (drop rows with NaN in 'productNr')
+    df = df.dropna(subset=['productNr'])
+
+    # Sort by case once; the stable sort keeps the original event order within each case
+    df = df.sort_values('productNr', kind='mergesort')
+
+    # Integer product numbers, so the case identifiers are the same whatever the column type of the input
+    product_nrs = df['productNr'].astype('int64')
+
+    # Convert all columns at once instead of row by row
+    processing_station = df['processingStation']
+    return pd.DataFrame({
+        "case:concept:name": product_nrs.astype(str),  # Case identifier
+        "concept:name": df['event'],  # Name of the event (activity)
+        "lifecycle:transition": "complete",  # Add lifecycle transition
+        "time:timestamp": pd.to_datetime(df['timeStamp']),  # Convert timestamps to datetime
+        "productType": df['productType'],  # Product type
+        "productNr": product_nrs,  # Product number
+        "vehicleType": df['vehicleType'].astype(str),  # Vehicle type (if applicable)
+        "org:resource": df['vehicle'].astype(str),  # Vehicle involved (if applicable)
+        "uniqueID": df['uniqueID'].astype('int64'),  # Unique ID for the event
+        "currentDecayLevel": df['currentDecayLevel'].astype(float),  # Current decay level
+        "productIDStr": df['productIDStr'],  # Product ID string
+        "processingStation": processing_station.astype(str).where(processing_station.notna(), "NA"),  # Processing station
+        "productID": df['productID'],  # Include productID as per your XES snippet
+    })
+
+# Function to load data from txt
+def load_data(file_path):
+    # Assuming the .txt file is tab-separated, adjust delimiter if necessary
+    df = pd.read_csv(file_path, delimiter='\t', dtype=raw_dtypes)
+    return df
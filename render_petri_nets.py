@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 16 2026
+
+Script: render_petri_nets.py
+Purpose: This script renders the Petri nets saved as PNML files by stage 03 to PNG images with Graphviz, separately
+         from the metrics computation. Models are identified by a hash of their structure: a model that has already
+         been rendered is skipped, and a model with the same structure as another one gets a copy of its image
+         instead of being rendered again. The manifest also records the state of every PNML file, so unchanged
+         files are not parsed again to compute their structure hash.
+Inputs: PNML files from the stage 03 output directory.
+Outputs: A PNG image per PNML file and a render manifest (.render_manifest.json), saved in the same directory.
+"""
+
+import json
+import os
+import shutil
+
+import pm4py
+from pm4py.visualization.petri_net import visualizer as pn_visualizer
+
+from build_cache import file_hash
+from conformance import petri_net_hash
+from dataset_index import directory_index, mining_output_dir
+from instrumentation import measure
+from parallel_runner import default_num_workers, run_parallel
+
+# Directory with the PNML files
+model_dir = mining_output_dir
+
+# Number of models rendered in parallel
+num_workers = default_num_workers
+
+# Name of the manifest with the structure hash of every rendered image and the state of its PNML file
+render_manifest_name = ".render_manifest.json"
+
+# Function to render a single PNML file to a PNG image
+def render_model(pnml_path, png_path):
+    with measure("render", os.path.basename(pnml_path)):
+        net, initial_marking, final_marking = pm4py.read_pnml(pnml_path)
+        gviz = pn_visualizer.apply(net, initial_marking, final_marking)
+        pn_visualizer.save(gviz, png_path)
+    return png_path
+
+# Function to render a (structure hash, PNML path, PNG path) item, for the process pool
+def render_model_item(item):
+    _, pnml_path, png_path = item
+    return render_model(pnml_path, png_path)
+
+# Function to get the state and structure hash of a PNML file; the file is only parsed when its size and
+# modification time, and then its content, differ from the state recorded in the manifest entry
+def pnml_model_state(pnml_path, entry=None):
+    stat = os.stat(pnml_path)
+    state = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    recorded = entry.get('pnml', {}) if isinstance(entry, dict) else {}
+    if recorded.get('size') == state['size'] and recorded.get('mtime_ns') == state['mtime_ns']:
+        return recorded, entry['model_hash']
+    state['sha256'] = file_hash(pnml_path)
+    if recorded.get('sha256') == state['sha256']:
+        return state, entry['model_hash']
+    return state, petri_net_hash(*pm4py.read_pnml(pnml_path))
+
+# Function to render the image of a model only when its structure was not rendered before
+def render_all_models(model_dir, num_workers=default_num_workers):
+    manifest_path = os.path.join(model_dir, render_manifest_name)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+
+    # Group the models that still need an image by the hash of their structure
+    pending, pnml_states = {}, {}
+    for pnml_path in directory_index(model_dir, ".pnml").file_paths():
+        file_name = os.path.basename(pnml_path)
+        png_name = f"{os.path.splitext(file_name)[0]}.png"
+        png_path = os.path.join(model_dir, png_name)
+        entry = manifest.get(png_name)
+        pnml_state, model_hash = pnml_model_state(pnml_path, entry)
+        pnml_states[png_name] = pnml_state
+        if isinstance(entry, dict) and entry['model_hash'] == model_hash and os.path.exists(png_path):
+            entry['pnml'] = pnml_state
+            continue
+        pending.setdefault(model_hash, []).append((pnml_path, png_path))
+
+    # Reuse an existing image of the same structure where possible, and render one model per structure otherwise;
+    # the images that are about to be replaced cannot be reused
+    pending_png_names = {os.path.basename(png_path) for models in pending.values() for _, png_path in models}
+    rendered_by_hash = {entry['model_hash']: os.path.join(model_dir, png_name) for png_name, entry in manifest.items()
+                        if isinstance(entry, dict) and png_name not in pending_png_names
+                        and os.path.exists(os.path.join(model_dir, png_name))}
+    to_render = [(model_hash, *models[0]) for model_hash, models in pending.items()
+                 if model_hash not in rendered_by_hash]
+    for result in run_parallel(render_model_item, to_render, num_workers, description="Rendered",
+                               item_label=lambda item: os.path.splitext(os.path.basename(item[1]))[0]):
+        if result.error is None:
+            model_hash, _, png_path = result.item
+            rendered_by_hash[model_hash] = png_path
+            png_name = os.path.basename(png_path)
+            manifest[png_name] = {'model_hash': model_hash, 'pnml': pnml_states[png_name]}
+
+    for model_hash, models in pending.items():
+        source_path = rendered_by_hash.get(model_hash)
+        if source_path is None:
+            continue
+        for _, png_path in models:
+            if png_path != source_path:
+                shutil.copyfile(source_path, png_path)
+            png_name = os.path.basename(png_path)
+            manifest[png_name] = {'model_hash': model_hash, 'pnml': pnml_states[png_name]}
+
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    print(f"Rendered {len(to_render)} distinct models for {sum(len(m) for m in pending.values())} PNML files.")
+
+# Start the procedure when running the script
+if __name__ == "__main__":
+    render_all_models(model_dir, num_workers)
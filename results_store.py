@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 16 2026
+
+Module: results_store.py
+Purpose: This module stores the metrics of stages 02 and 03 as typed rows in a local SQLite results table, keyed by
+         event log, experiment and run. Stages 04 to 06 query this table instead of re-parsing the text reports,
+         and generate the text reports from it.
+Inputs: The metrics computed per event log by kpi_engine.py and conformance.py.
+Outputs: A SQLite database (pmso_results.sqlite) with the tables run_metrics, vehicle_utilization and
+         processed_logs.
+"""
+
+import contextlib
+import re
+import sqlite3
+
+# Default location of the results database, relative to the current directory like the stage directories
+default_results_db = "pmso_results.sqlite"
+
+# Stage names used in the results table
+event_log_kpis_stage = "event_log_kpis"
+conformance_stage = "conformance"
+
+# Pattern of the experiment and run in the event log names (e.g., Exp3Run12)
+log_name_pattern = re.compile(r"Exp(\d+)Run(\d+)")
+
+schema = """
+CREATE TABLE IF NOT EXISTS run_metrics (
+    log_name TEXT NOT NULL,
+    experiment INTEGER,
+    run INTEGER,
+    stage TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (log_name, metric)
+);
+CREATE INDEX IF NOT EXISTS run_metrics_experiment_run ON run_metrics (experiment, run);
+CREATE TABLE IF NOT EXISTS vehicle_utilization (
+    log_name TEXT NOT NULL,
+    experiment INTEGER,
+    run INTEGER,
+    position INTEGER NOT NULL,
+    vehicle TEXT NOT NULL,
+    utilization_time REAL,
+    utilization_rate REAL,
+    PRIMARY KEY (log_name, vehicle)
+);
+CREATE TABLE IF NOT EXISTS processed_logs (
+    stage TEXT NOT NULL,
+    log_name TEXT NOT NULL,
+    PRIMARY KEY (stage, log_name)
+);
+"""
+
+# Function to get the experiment and run number from an event log name, or (None, None) if it has none
+def parse_experiment_run(log_name):
+    match = log_name_pattern.search(log_name)
+    if match is None:
+        return None, None
+    return int(match.group(1)), int(match.group(2))
+
+# Function to format the conformance metrics report of stage 03
+def format_conformance_metrics(metrics):
+    text = (f"Fitness (Token-Based Replay): {metrics['fitness_tbr']:.2f}%\n"
+            f"Precision (Token-Based Replay): {metrics['precision_tbr']:.4f}\n")
+    # Approximate metrics: confidence intervals and the number of cases they are based on
+    if 'sample_size' in metrics:
+        confidence = f"{100 * metrics['confidence']:g}%"
+        text += (f"Fitness {confidence} Confidence Interval: +/- {metrics['fitness_tbr_half_width']:.2f}%\n"
+                 f"Precision {confidence} Confidence Interval: +/- {metrics['precision_tbr_half_width']:.4f}\n"
+                 f"Sample Size: {int(metrics['sample_size'])} of {int(metrics['num_cases'])} cases\n")
+    # Alignment-based metrics, when they were computed next to the token-based replay metrics
+    if 'fitness_alignments' in metrics:
+        text += (f"Fitness (Alignments): {metrics['fitness_alignments']:.4f}\n"
+                 f"Fitting Traces (Alignments): {metrics['fitting_traces_alignments']:.2f}%\n"
+                 f"Precision (Alignments): {metrics['precision_alignments']:.4f}\n")
+    return text
+
+# Function to format the average cycle time line of the KPI report of stage 02
+def format_cycle_time(average_cycle_time):
+    return f"Average Product Cycle Time: {average_cycle_time:.2f} seconds"
+
+# Function to open the results database; the timeout lets concurrent workers wait for each other's writes
+def connect(db_path=default_results_db):
+    connection = sqlite3.connect(db_path, timeout=60)
+    connection.executescript(schema)
+    return connection
+
+# Function to replace the metrics of a stage for an event log
+def write_run_metrics(db_path, stage, log_name, metrics, vehicle_utilization=None):
+    experiment, run = parse_experiment_run(log_name)
+    with contextlib.closing(connect(db_path)) as connection, connection:
+        connection.execute("DELETE FROM run_metrics WHERE log_name = ? AND stage = ?", (log_name, stage))
+        connection.executemany(
+            "INSERT OR REPLACE INTO run_metrics VALUES (?, ?, ?, ?, ?, ?)",
+            [(log_name, experiment, run, stage, metric, float(value)) for metric, value in metrics.items()]
+        )
+        if vehicle_utilization is not None:
+            connection.execute("DELETE FROM vehicle_utilization WHERE log_name = ?", (log_name,))
+            connection.executemany(
+                "INSERT INTO vehicle_utilization VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(log_name, experiment, run, position, str(vehicle), float(row['UtilizationTime']),
+                  float(row['UtilizationRate']))
+                 for position, (vehicle, row) in enumerate(vehicle_utilization.iterrows())]
+            )
+        connection.execute("INSERT OR REPLACE INTO processed_logs VALUES (?, ?)", (stage, log_name))
+
+# Function to check whether a stage has recorded an event log, also when it found no metrics for it
+def has_log(db_path, stage, log_name):
+    with contextlib.closing(connect(db_path)) as connection:
+        row = connection.execute("SELECT 1 FROM processed_logs WHERE stage = ? AND log_name = ?",
+                                 (stage, log_name)).fetchone()
+    return row is not None
+
+# Function to read the metrics of all experiments and runs in one indexed scan, as
+# {(experiment, run): {stage: {metric: value}}}
+def read_run_metrics(db_path=default_results_db):
+    results = {}
+    with contextlib.closing(connect(db_path)) as connection:
+        rows = connection.execute(
+            "SELECT experiment, run, stage, metric, value FROM run_metrics "
+            "WHERE experiment IS NOT NULL ORDER BY experiment, run"
+        )
+        for experiment, run, stage, metric, value in rows:
+            results.setdefault((experiment, run), {}).setdefault(stage, {})[metric] = value
+    return results
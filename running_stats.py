@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 16 2026
+
+Module: running_stats.py
+Purpose: This module keeps cumulative statistics (count, mean, standard deviation and confidence interval) of a
+         stream of values in constant time and memory per value, with Welford's update. Accumulators can be merged,
+         so partial statistics of different experiments or workers can be combined without the individual values.
+Inputs: The values of a metric, one at a time.
+Outputs: The mean, sample standard deviation and confidence interval half-width of the values seen so far.
+"""
+
+import math
+import statistics
+
+# Function to compute P(T <= t) of Student's t distribution with an integer number of degrees of freedom, with the
+# closed-form series of Abramowitz and Stegun (26.7.3 and 26.7.4)
+def student_t_cdf(t, degrees_of_freedom):
+    theta = math.atan(abs(t) / math.sqrt(degrees_of_freedom))
+    cos_squared = math.cos(theta) ** 2
+    if degrees_of_freedom % 2 == 1:
+        term, series = 1.0, 1.0 if degrees_of_freedom > 1 else 0.0
+        for k in range(2, degrees_of_freedom - 1, 2):
+            term *= cos_squared * k / (k + 1)
+            series += term
+        probability = 2 / math.pi * (theta + math.sin(theta) * math.cos(theta) * series)
+    else:
+        term, series = 1.0, 1.0
+        for k in range(1, degrees_of_freedom - 2, 2):
+            term *= cos_squared * k / (k + 1)
+            series += term
+        probability = math.sin(theta) * series
+    return 0.5 + math.copysign(probability / 2, t)
+
+# Function to compute the quantile of Student's t distribution by bisection on its distribution function
+def student_t_quantile(p, degrees_of_freedom, tolerance=1e-12):
+    if p == 0.5:
+        return 0.0
+    if p < 0.5:
+        return -student_t_quantile(1 - p, degrees_of_freedom, tolerance)
+    low, high = 0.0, max(1.0, 2 * statistics.NormalDist().inv_cdf(p))
+    while student_t_cdf(high, degrees_of_freedom) < p:
+        low, high = high, 2 * high
+    while high - low > tolerance * high:
+        middle = (low + high) / 2
+        if student_t_cdf(middle, degrees_of_freedom) < p:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+# Class with the cumulative statistics of a metric
+class RunningStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.m2 = 0.0
+
+    # The mean is kept as the running sum divided by the count, which equals sum(values) / len(values)
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    # Function to add a value (Welford's update of the sum of squared deviations)
+    def add(self, value):
+        previous_mean = self.mean if self.count else 0.0
+        self.count += 1
+        self.total += value
+        self.m2 += (value - previous_mean) * (value - self.mean)
+        return self
+
+    # Function to combine the statistics of another accumulator into this one (Chan et al.'s parallel update)
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.total, self.m2 = other.count, other.total, other.m2
+            return self
+        delta = other.mean - self.mean
+        count = self.count + other.count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        return self
+
+    # Function to compute the sample standard deviation; zero for a single value, as in the cumulative statistics of 06
+    def stdev(self):
+        if self.count == 0:
+            return None
+        if self.count == 1:
+            return 0.0
+        return math.sqrt(max(self.m2, 0.0) / (self.count - 1))
+
+    # Function to compute the half-width of the confidence interval of the mean, with Student's t distribution
+    def ci_half_width(self, confidence=0.95):
+        if self.count < 2:
+            return None
+        quantile = student_t_quantile((1 + confidence) / 2, self.count - 1)
+        return quantile * self.stdev() / math.sqrt(self.count)
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 16 2026
+
+Module: tests/test_conformance.py
+Purpose: Regression tests for the conformance metrics of conformance.py. The metrics computed once per variant (and
+         prefix) are compared with pm4py's own functions on an event log that does not fit its model perfectly, so
+         both the fitting and the unfitting prefixes and the weighting of the empty prefix are covered.
+Inputs: None, the event logs are generated synthetically by benchmarks/synthetic_event_logs.py.
+Outputs: pytest results.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pm4py
+import pytest
+
+# Make the pipeline modules importable from the tests folder
+repository_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repository_dir)
+
+from benchmarks.synthetic_event_logs import generate_raw_data
+from conformance import alignment_conformance, mining_columns, token_based_conformance
+from raw_event_log import create_event_log_dataframe
+
+# Function to generate an event log DataFrame in which some pairs of consecutive events swapped their activity and
+# some events are missing, so its cases follow more variants than the synthetic transport sequence
+def noisy_event_log(seed, num_swaps, num_events=800, num_dropped=20):
+    event_df = create_event_log_dataframe(generate_raw_data(num_events, seed=seed))[mining_columns]
+    rng = np.random.default_rng(seed)
+    activities = event_df['concept:name'].to_numpy(dtype=object)
+    rows = rng.choice(len(activities) - 1, num_swaps, replace=False)
+    activities[rows], activities[rows + 1] = activities[rows + 1], activities[rows]
+    dropped = event_df.index[rng.choice(len(event_df), num_dropped, replace=False)]
+    return event_df.assign(**{'concept:name': activities}).drop(index=dropped)
+
+# Model discovered from a slightly noisy log, and a noisier log that does not fit it perfectly
+@pytest.fixture(scope="module")
+def unfitting_log_and_model():
+    net, initial_marking, final_marking = pm4py.discover_petri_net_inductive(noisy_event_log(100, 5))
+    return noisy_event_log(0, 40), net, initial_marking, final_marking
+
+def test_variant_replay_matches_pm4py(unfitting_log_and_model):
+    event_log, net, initial_marking, final_marking = unfitting_log_and_model
+    metrics = token_based_conformance(event_log, net, initial_marking, final_marking, "variants")
+    fitness = pm4py.fitness_token_based_replay(event_log, net, initial_marking, final_marking)
+    precision = pm4py.precision_token_based_replay(event_log, net, initial_marking, final_marking)
+
+    assert metrics['fitness_tbr'] < 100.0
+    assert metrics['fitness_tbr'] == pytest.approx(fitness['percentage_of_fitting_traces'])
+    assert metrics['precision_tbr'] == pytest.approx(precision)
+
+def test_variant_alignments_match_pm4py(unfitting_log_and_model):
+    event_log, net, initial_marking, final_marking = unfitting_log_and_model
+    metrics = alignment_conformance(event_log, net, initial_marking, final_marking)
+    fitness = pm4py.fitness_alignments(event_log, net, initial_marking, final_marking, multi_processing=False)
+    precision = pm4py.precision_alignments(event_log, net, initial_marking, final_marking, multi_processing=False)
+
+    assert metrics['fitness_alignments'] < 1.0
+    assert metrics['fitness_alignments'] == pytest.approx(fitness['log_fitness'])
+    assert metrics['fitting_traces_alignments'] == pytest.approx(fitness['percentage_of_fitting_traces'])
+    assert metrics['precision_alignments'] == pytest.approx(precision)
+
+def test_approximate_replay_without_sampling_is_exact(unfitting_log_and_model):
+    event_log, net, initial_marking, final_marking = unfitting_log_and_model
+    exact = token_based_conformance(event_log, net, initial_marking, final_marking, "variants")
+    # With every variant in the census strata no case is sampled
+    approximate = token_based_conformance(event_log, net, initial_marking, final_marking, "approximate",
+                                          approximation={'census_share': 0.0})
+
+    assert approximate['fitness_tbr'] == pytest.approx(exact['fitness_tbr'])
+    assert approximate['precision_tbr'] == pytest.approx(exact['precision_tbr'])
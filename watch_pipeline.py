@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 16 2026
+
+Script: watch_pipeline.py
+Purpose: This script keeps the pipeline up to date while the simulation replications land in 01_raw_input. It polls
+         the raw input folder, waits until a new or changed Exp*Run*.txt file has not changed for a while (so files
+         that are still being written are left alone), converts only those files and then runs the KPI, conformance
+         and summary stages. The build caches of the stages make sure only the new or changed runs (and, with
+         discovery per experiment, the other runs of their experiment) are recomputed; the summaries and cumulative
+         statistics are regenerated from the results table when it changed. Stop it with Ctrl+C.
+Inputs: Raw simulation output (Exp*Run*.txt) arriving in the input folder of 01_convert_to_xes.py.
+Outputs: The outputs of stages 01 to 06, updated minutes after a run finishes.
+"""
+
+import importlib
+import os
+import re
+import time
+import traceback
+
+from parallel_runner import default_num_workers
+
+# Seconds between two scans of the raw input folder
+poll_interval = 30
+
+# Seconds a raw file has to keep the same size and modification time before it is processed
+settle_seconds = 60
+
+# Raw files that are picked up
+raw_file_pattern = re.compile(r'Exp\d+Run\d+\.txt$')
+
+# Number of worker processes of every stage
+num_workers = default_num_workers
+
+# Compute the KPIs and the process mining indicators with 02_03_combined_analysis.py (one read per event log)
+# instead of 02_extract_event_log_indicators.py and 03_extract_process_mining_indicators.py
+use_combined_analysis = False
+
+# Function to import a pipeline stage by its script name
+def load_stage(script_name):
+    return importlib.import_module(os.path.splitext(script_name)[0])
+
+# Function to get the size and modification time of every raw file in the folder
+def scan_raw_files(raw_dir):
+    if not os.path.isdir(raw_dir):
+        return {}
+    states = {}
+    with os.scandir(raw_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and raw_file_pattern.match(entry.name):
+                stat = entry.stat()
+                states[entry.path] = (stat.st_size, stat.st_mtime_ns)
+    return states
+
+# Function to get the scripts that compute the KPIs and the process mining indicators
+def analysis_stages():
+    if use_combined_analysis:
+        return ["02_03_combined_analysis.py"]
+    return ["02_extract_event_log_indicators.py", "03_extract_process_mining_indicators.py"]
+
+# Function to push the given raw files through the pipeline; the later stages only recompute what changed. Returns
+# the raw files that were converted, or were already up to date; the files that failed to convert are left out
+def run_pipeline(raw_paths, num_workers=default_num_workers):
+    convert = load_stage("01_convert_to_xes.py")
+    results = convert.process_all_files(convert.input_folder, convert.output_folder, convert.output_format,
+                                        convert.streaming, num_workers, True, convert.compress_xes,
+                                        file_paths=raw_paths, end_activity=convert.end_activity)
+    failed_paths = {result.item for result in results if result.error is not None}
+
+    if use_combined_analysis:
+        combined = load_stage("02_03_combined_analysis.py")
+        combined.process_all_files(combined.input_dir, combined.kpi_output_dir, combined.mining_output_dir,
+                                   num_workers, True, combined.results_db)
+        results_db = combined.results_db
+    else:
+        kpis = load_stage("02_extract_event_log_indicators.py")
+        kpis.process_all_files(kpis.input_dir, kpis.output_dir, num_workers, True, kpis.results_db)
+        mining = load_stage("03_extract_process_mining_indicators.py")
+        mining.process_all_files(mining.input_dir, mining.output_dir, num_workers, True, mining.results_db)
+        results_db = mining.results_db
+
+    load_stage("04_summaries_per_experiment.py").summarize_experiments(True, results_db)
+    load_stage("05_combined_summaries.py").combine_summaries(True, results_db)
+    load_stage("06_combined_summaries_with_stats.py").combine_summaries_with_stats(True, results_db)
+    return [path for path in raw_paths if path not in failed_paths]
+
+# Function to watch the raw input folder and process every raw file once it has settled. A raw file is processed
+# again when it changes; a raw file that failed to convert, or a failing pipeline run, is retried at the next scan
+def watch(raw_dir, poll_interval=poll_interval, settle_seconds=settle_seconds, num_workers=default_num_workers):
+    # Stages 04 to 06 read the results table, so a pipeline without one can never be brought up to date
+    if any(load_stage(script_name).results_db is None for script_name in analysis_stages()):
+        raise ValueError("Stages 04 to 06 read the results table; set results_db in the KPI and conformance stages.")
+    print(f"Watching '{raw_dir}' every {poll_interval} seconds (Ctrl+C to stop).")
+    # Last observed state of every raw file with the time it was first observed, and the state that was processed
+    observed, processed = {}, {}
+    while True:
+        now = time.monotonic()
+        states = scan_raw_files(raw_dir)
+        for path, state in states.items():
+            if path not in observed or observed[path][0] != state:
+                observed[path] = (state, now)
+
+        ready = [path for path, state in sorted(states.items())
+                 if processed.get(path) != state and now - observed[path][1] >= settle_seconds]
+        if ready:
+            print(f"Processing {len(ready)} new or changed raw files: "
+                  f"{', '.join(os.path.basename(path) for path in ready)}")
+            try:
+                converted = run_pipeline(ready, num_workers)
+                processed.update({path: states[path] for path in converted})
+                if len(converted) < len(ready):
+                    print(f"{len(ready) - len(converted)} raw files failed to convert and are retried at the next "
+                          f"scan.")
+                print(f"Pipeline is up to date with {len(processed)} raw files.")
+            except Exception:
+                traceback.print_exc()
+        time.sleep(poll_interval)
+
+# Start watching when running the script
+if __name__ == "__main__":
+    try:
+        watch(load_stage("01_convert_to_xes.py").input_folder, poll_interval, settle_seconds, num_workers)
+    except KeyboardInterrupt:
+        print("Stopped watching.")
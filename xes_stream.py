@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 16 2026
+
+Module: xes_stream.py
+Purpose: This module reads and writes XES event logs incrementally, so neither needs memory proportional to the
+         size of the log. The writer appends the traces of event log DataFrames as they are produced, optionally
+         gzip-compressed (.xes.gz). The reader parses the file with iterparse, yields one trace at a time with only
+         the requested attributes and discards the parsed elements as it goes.
+Inputs: pm4py-compatible event log DataFrames (see create_event_log_dataframe in raw_event_log.py), or XES files.
+Outputs: XES files, and traces or event log DataFrames restricted to the requested attributes.
+"""
+
+import gzip
+import os
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+import pandas as pd
+
+# Extension of gzip-compressed files
+gzip_extension = ".gz"
+
+# Extensions and classifiers written in the header of the log, as in 01_convert_to_xes.py
+xes_extensions = [
+    ('Time', 'time', 'http://www.xes-standard.org/time.xesext'),
+    ('Lifecycle', 'lifecycle', 'http://www.xes-standard.org/lifecycle.xesext'),
+    ('Concept', 'concept', 'http://www.xes-standard.org/concept.xesext'),
+    ('Organizational', 'org', 'http://www.xes-standard.org/org.xesext'),
+]
+xes_classifiers = [
+    ('Event Name', 'concept:name'),
+    ('(Event Name AND Lifecycle transition)', 'concept:name lifecycle:transition'),
+]
+
+# Function to open an XES file as a binary stream for reading or a text stream for writing; .gz files are
+# decompressed or compressed on the fly
+def open_xes(file_path, mode='r'):
+    compressed = file_path.endswith(gzip_extension)
+    if mode == 'r':
+        return gzip.open(file_path, 'rb') if compressed else open(file_path, 'rb')
+    return gzip.open(file_path, 'wt', encoding='utf-8') if compressed else open(file_path, 'w', encoding='utf-8')
+
+# Function to format the values of a column as XES attribute elements; missing values give an empty string
+def attribute_elements(key, values):
+    key = quoteattr(key)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        formatted = values.map(lambda value: value.isoformat(), na_action='ignore')
+        tag = 'date'
+    elif pd.api.types.is_bool_dtype(values):
+        formatted = values.map(lambda value: 'true' if value else 'false', na_action='ignore')
+        tag = 'boolean'
+    elif pd.api.types.is_integer_dtype(values):
+        formatted = values.map(lambda value: str(int(value)), na_action='ignore')
+        tag = 'int'
+    elif pd.api.types.is_float_dtype(values):
+        formatted = values.map(str, na_action='ignore')
+        tag = 'float'
+    else:
+        formatted = values.map(str, na_action='ignore')
+        tag = 'string'
+    return [f'<{tag} key={key} value={quoteattr(value)}/>' if isinstance(value, str) else ''
+            for value in formatted.tolist()]
+
+# Class to write the traces of event log DataFrames to an XES file as they are produced
+class XesStreamWriter:
+    def __init__(self, output_path, case_column='case:concept:name', log_name="XES Event Log"):
+        self.output_path = output_path
+        self.case_column = case_column
+        self.file = open_xes(output_path, 'w')
+        self.file.write("<?xml version='1.0' encoding='UTF-8'?>\n")
+        self.file.write('<log xes.version="1849-2016" xes.features="nested-attributes" '
+                        'xmlns="http://www.xes-standard.org/">\n')
+        for name, prefix, uri in xes_extensions:
+            self.file.write(f'\t<extension name={quoteattr(name)} prefix={quoteattr(prefix)} uri={quoteattr(uri)}/>\n')
+        for name, keys in xes_classifiers:
+            self.file.write(f'\t<classifier name={quoteattr(name)} keys={quoteattr(keys)}/>\n')
+        self.file.write(f'\t<string key="concept:name" value={quoteattr(log_name)}/>\n')
+
+    # Function to write the cases of an event log DataFrame whose events are contiguous per case
+    def write(self, event_df):
+        if event_df.empty:
+            return
+        case_names = event_df[self.case_column].astype(str).to_numpy()
+        case_starts = np.flatnonzero(np.r_[True, case_names[1:] != case_names[:-1]])
+        case_ends = np.r_[case_starts[1:], len(case_names)]
+
+        # Format every attribute column at once, then join the elements per event
+        columns = [attribute_elements(col, event_df[col]) for col in event_df.columns if col != self.case_column]
+        events = ["\t\t<event>" + "".join(elements) + "</event>\n" for elements in zip(*columns)]
+        for start, end in zip(case_starts, case_ends):
+            self.file.write(f'\t<trace><string key="concept:name" value={quoteattr(case_names[start])}/>\n')
+            self.file.writelines(events[start:end])
+            self.file.write("\t</trace>\n")
+
+    def close(self):
+        if self.file is not None and not self.file.closed:
+            self.file.write("</log>\n")
+            self.file.close()
+
+    # Function to close the file without finishing the log and remove it, so an interrupted write never leaves a
+    # well-formed but truncated XES file
+    def discard(self):
+        if self.file is not None and not self.file.closed:
+            self.file.close()
+        if os.path.exists(self.output_path):
+            os.remove(self.output_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+# Function to convert the value of an XES attribute element to a Python value; dates are kept as text and converted
+# per column
+def attribute_value(tag, value):
+    if tag == 'int':
+        return int(value)
+    if tag == 'float':
+        return float(value)
+    if tag == 'boolean':
+        return value.lower() == 'true'
+    return value
+
+# Function to iterate over the traces of an XES file as (case identifier, list of event attribute dictionaries),
+# with only the requested event attributes (all attributes if attributes is None)
+def iter_xes_traces(file_path, attributes=None):
+    wanted = set(attributes) if attributes is not None else None
+    with open_xes(file_path, 'r') as f:
+        # Depth of the current element below the log element: 1 for traces, 2 for events and trace attributes and
+        # 3 for event attributes
+        root, depth = None, -1
+        case_name, events, event = None, [], None
+        for action, element in ET.iterparse(f, events=('start', 'end')):
+            tag = element.tag.rsplit('}', 1)[-1]
+            if action == 'start':
+                depth += 1
+                if root is None:
+                    root = element
+                elif tag == 'trace' and depth == 1:
+                    case_name, events = None, []
+                elif tag == 'event' and depth == 2:
+                    event = {}
+                continue
+
+            key = element.get('key')
+            if depth == 3 and event is not None and key is not None:
+                if wanted is None or key in wanted:
+                    event[key] = attribute_value(tag, element.get('value'))
+            elif depth == 2 and tag == 'event':
+                events.append(event)
+                event = None
+                element.clear()
+            elif depth == 2 and key == 'concept:name':
+                case_name = element.get('value')
+            elif depth == 1 and tag == 'trace':
+                yield case_name, events
+                # Discard the parsed trace, so memory does not grow with the number of traces
+                root.clear()
+            depth -= 1
+
+# Function to read an XES file incrementally into an event log DataFrame with the requested columns; the case
+# identifier is available as 'case:concept:name'
+def read_xes_dataframe(file_path, columns=None, case_column='case:concept:name'):
+    attributes = None if columns is None else [col for col in columns if col != case_column]
+    # The values are collected per column, so only the events of the current trace are kept as dictionaries;
+    # attributes that an event does not have are None
+    case_names, values = [], {key: [] for key in attributes or []}
+    for case_name, events in iter_xes_traces(file_path, attributes):
+        for event in events:
+            for key in event:
+                if key not in values:
+                    values[key] = [None] * len(case_names)
+            for key, column in values.items():
+                column.append(event.get(key))
+            case_names.append(case_name)
+    # Requested attributes that no event has are missing values (NaN), as in a DataFrame built from records
+    event_df = pd.DataFrame({key: column if any(value is not None for value in column) else np.nan
+                             for key, column in values.items()}, index=pd.RangeIndex(len(case_names)))
+    event_df.insert(0, case_column, case_names)
+    if 'time:timestamp' in event_df.columns:
+        event_df['time:timestamp'] = pd.to_datetime(event_df['time:timestamp'], utc=True)
+    if columns is not None:
+        event_df = event_df[[col for col in columns if col in event_df.columns]]
+    return event_df